@@ -0,0 +1,119 @@
+"""In-process cache of finished /agent/result responses, plus their ETags.
+
+A SUCCEEDED job never changes: claim_job refuses to run it again. When its
+bill is the row linked to it by job_id, the response is final and is cached
+until TTL/LRU eviction. Pre-0002 fallback results are not cached. A FAILED job can still be retried, so it is
+cached only while the notifier is listening. Every job status NOTIFY evicts the
+job (see api.notifier), so a retry drops the entry on every API instance.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import orjson
+
+from shared.config import RESULT_CACHE_ENABLED, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL_SECONDS
+
+
+class CachedResult(NamedTuple):
+    payload: dict
+    etag: str
+    final: bool = False  # can never change: safe to mark immutable
+
+
+def result_etag(payload: dict) -> str:
+    """Strong ETag over the response body."""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResultCache:
+    """LRU + TTL cache of terminal job results, keyed by job id."""
+
+    def __init__(self, max_entries: int = RESULT_CACHE_MAX_ENTRIES, ttl_seconds: int = RESULT_CACHE_TTL_SECONDS,
+                 enabled: bool = RESULT_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries = OrderedDict()  # job_id -> (expires_at, CachedResult)
+        self._invalidated = OrderedDict()  # job_id -> invalidation sequence number, recent only
+        self._invalidated_all = 0
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, job_id: int):
+        """Return the CachedResult, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[job_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(job_id)
+            self.hits += 1
+            return entry[1]
+
+    def token(self) -> int:
+        """Take before reading the job from the DB; put() uses it to detect a change during the read."""
+        with self._lock:
+            return self._sequence
+
+    def put(self, job_id: int, payload: dict, token: int, final: bool = False) -> CachedResult:
+        """Cache a terminal result unless the job was invalidated after `token` was taken."""
+        result = CachedResult(payload, result_etag(payload), final)
+        if not self.enabled:
+            return result
+        with self._lock:
+            if self._invalidated.get(job_id, -1) > token or self._invalidated_all > token:
+                return result  # changed while we read it: serve, but don't keep
+            self._entries[job_id] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(job_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, job_id: int = None):
+        """Drop one job, or (job_id=None, after missed notifications) every entry that can still change."""
+        with self._lock:
+            self._sequence += 1
+            if job_id is None:
+                self._invalidated_all = self._sequence
+                for key in [key for key, (_, result) in self._entries.items() if not result.final]:
+                    del self._entries[key]
+                return
+            self._entries.pop(job_id, None)
+            self._invalidated[job_id] = self._sequence
+            self._invalidated.move_to_end(job_id)
+            while len(self._invalidated) > self.max_entries:
+                self._invalidated.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,95 @@
+"""Job listing and bulk status lookup.
+
+Pages are keyset-paginated newest first on (created_at, id). The cursor is the
+last row's key, and the next page is `WHERE (created_at, id) < cursor`. That
+condition is an index range scan on the composite indexes declared on
+IngestionJob, so page 1000 costs the same as page 1. There is no OFFSET and no
+COUNT, and each page is one query.
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from shared import IngestionJob, UtilityAccount
+
+JOB_COLUMNS = (
+    IngestionJob.id,
+    IngestionJob.utility_account_id,
+    IngestionJob.job_type,
+    IngestionJob.status,
+    IngestionJob.error_message,
+    IngestionJob.attempt_count,
+    IngestionJob.created_at,
+    IngestionJob.updated_at,
+)
+
+
+def encode_cursor(created_at: datetime, job_id: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, job_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, job_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(job_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def job_status(row) -> dict:
+    return {
+        "job_id": row.id,
+        "utility_account_id": row.utility_account_id,
+        "job_type": row.job_type,
+        "status": row.status,
+        "error_message": row.error_message,
+        "attempt_count": row.attempt_count,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+    }
+
+
+def list_jobs(db: Session, limit: int, cursor: str = None, status: str = None, customer_id: int = None,
+              utility_account_id: int = None, created_after: datetime = None, created_before: datetime = None) -> dict:
+    """One page of jobs matching the filters, newest first."""
+    query = db.query(*JOB_COLUMNS)
+    if customer_id is not None:
+        query = query.join(UtilityAccount, UtilityAccount.id == IngestionJob.utility_account_id).filter(
+            UtilityAccount.customer_id == customer_id
+        )
+    if status:
+        query = query.filter(IngestionJob.status == status)
+    if utility_account_id is not None:
+        query = query.filter(IngestionJob.utility_account_id == utility_account_id)
+    if created_after:
+        query = query.filter(IngestionJob.created_at >= created_after)
+    if created_before:
+        query = query.filter(IngestionJob.created_at < created_before)
+    if cursor:
+        # Row comparison, so Postgres can seek the (…, created_at, id) index directly
+        query = query.filter(tuple_(IngestionJob.created_at, IngestionJob.id) < decode_cursor(cursor))
+
+    # One extra row tells us whether there is a next page without a COUNT
+    rows = query.order_by(IngestionJob.created_at.desc(), IngestionJob.id.desc()).limit(limit + 1).all()
+    page, more = rows[:limit], len(rows) > limit
+    return {
+        "jobs": [job_status(row) for row in page],
+        "next_cursor": encode_cursor(page[-1].created_at, page[-1].id) if more else None,
+    }
+
+
+def lookup_jobs(db: Session, job_ids: list) -> dict:
+    """Status of many jobs in one primary-key query, in request order."""
+    job_ids = list(dict.fromkeys(job_ids))
+    rows = {row.id: row for row in db.query(*JOB_COLUMNS).filter(IngestionJob.id.in_(job_ids))}
+    return {
+        "jobs": [job_status(rows[job_id]) for job_id in job_ids if job_id in rows],
+        "missing": [job_id for job_id in job_ids if job_id not in rows],
+    }
@@ -1,22 +1,51 @@
 """MiniMeter API."""
-from fastapi import FastAPI, Depends, HTTPException
+import time
+from datetime import datetime
+
+import orjson
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, ORJSONResponse, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import text, insert, cast, Text
 
 from shared import (
-    get_db_dependency, Base, engine,
-    CustomerCreate, UtilityAccountCreate, IngestRunRequest,
+    get_db, get_db_dependency, init_db, pool_stats,
+    CustomerCreate, UtilityAccountCreate, IngestRunRequest, AgentRunBatchRequest, JobLookupRequest,
     HealthResponse, CustomerResponse, UtilityAccountResponse, JobResponse, AgentResultResponse, BillResult,
+    AgentRunBatchResponse, JobPage, JobLookupResponse,
     Customer, UtilityAccount, IngestionJob, NormalizedBillSQL
 )
-from .pubsub import publish_job
+from shared.config import (
+    DB_INIT_ON_STARTUP, JOB_WAIT_MAX_SECONDS, JOB_WAIT_POLL_SECONDS, JOBS_PAGE_MAX, RESULT_HTTP_MAX_AGE,
+)
+from shared.events import TERMINAL_STATUSES
+from .notifier import notifier
+from .cache import result_cache, result_etag, etag_matches, CachedResult
+from .jobs import list_jobs, lookup_jobs
+from .outbox import enqueue_job_message, enqueue_job_messages, relay
 from .secrets import check_secret_access
 
+app = FastAPI(
+    title="MiniMeter API", description="AI-powered energy bill processing", version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+
+@app.on_event("startup")
+def startup():
+    if DB_INIT_ON_STARTUP:
+        init_db()
+    relay.start()
+    # Any status change (e.g. a FAILED job being retried) evicts the job's cached result
+    notifier.add_listener(result_cache.invalidate)
+    notifier.start()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="MiniMeter API", description="AI-powered energy bill processing", version="1.0.0")
+@app.on_event("shutdown")
+def shutdown():
+    notifier.stop()
+    relay.stop()
 
 
 # ============================================================
@@ -28,6 +57,18 @@ def health():
     return {"ok": True}
 
 
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Connection pool occupancy and checkout latency for this instance."""
+    return pool_stats()
+
+
+@app.get("/metrics/result-cache")
+def result_cache_metrics():
+    """Hit rate of this instance's /agent/result cache."""
+    return result_cache.stats()
+
+
 @app.get("/secrets/check", response_model=HealthResponse)
 def secrets_check():
     if check_secret_access():
@@ -81,10 +122,36 @@ def create_utility_account(data: UtilityAccountCreate, db: Session = Depends(get
 def run_ingest(data: IngestRunRequest, db: Session = Depends(get_db_dependency)):
     job = IngestionJob(utility_account_id=data.utility_account_id, job_type=data.job_type, status="PENDING")
     db.add(job)
+    enqueue_job_message(db, job)
+    job_id = job.id  # read before commit expires the instance (saves a refresh query)
     db.commit()
-    db.refresh(job)
-    publish_job(job.id, data.utility_account_id, data.job_type)
-    return {"job_id": job.id, "status": job.status, "message": "Job created"}
+    relay.wake()
+    return {"job_id": job_id, "status": "PENDING", "message": "Job created"}
+
+
+# ============================================================
+# JOBS
+# ============================================================
+
+@app.get("/jobs", response_model=JobPage)
+def get_jobs(
+    status: str = None,
+    customer_id: int = None,
+    utility_account_id: int = None,
+    created_after: datetime = None,
+    created_before: datetime = None,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=JOBS_PAGE_MAX),
+    db: Session = Depends(get_db_dependency),
+):
+    """List jobs newest first. Follow next_cursor for more pages."""
+    return list_jobs(db, limit, cursor, status, customer_id, utility_account_id, created_after, created_before)
+
+
+@app.post("/jobs/lookup", response_model=JobLookupResponse)
+def post_jobs_lookup(data: JobLookupRequest, db: Session = Depends(get_db_dependency)):
+    """Status of many jobs by id in one query (ids go in the body: thousands don't fit in a URL)."""
+    return lookup_jobs(db, data.job_ids)
 
 
 # ============================================================
@@ -100,41 +167,201 @@ def agent_run(utility_account_id: int, db: Session = Depends(get_db_dependency))
     
     job = IngestionJob(utility_account_id=utility_account_id, job_type="FULL_PIPELINE", status="PENDING")
     db.add(job)
+    # Outbox row commits with the job; the relay publishes it right after
+    enqueue_job_message(db, job, customer_id=account.customer_id)
+    job_id = job.id
     db.commit()
-    db.refresh(job)
+    relay.wake()
     
-    publish_job(job.id, utility_account_id, "FULL_PIPELINE", customer_id=account.customer_id)
-    return {"job_id": job.id, "status": job.status, "message": f"Poll /agent/result/{job.id}"}
+    return {"job_id": job_id, "status": "PENDING", "message": f"Poll /agent/result/{job_id}"}
+
+
+@app.post("/agent/run-batch", response_model=AgentRunBatchResponse)
+def agent_run_batch(data: AgentRunBatchRequest, db: Session = Depends(get_db_dependency)):
+    """Start the agent for many utility accounts: one lookup, one bulk insert, one commit."""
+    account_ids = list(dict.fromkeys(data.utility_account_ids))  # dedupe, keep order
+    
+    customers = dict(
+        db.query(UtilityAccount.id, UtilityAccount.customer_id)
+        .filter(UtilityAccount.id.in_(account_ids))
+        .all()
+    )
+    missing = [account_id for account_id in account_ids if account_id not in customers]
+    if missing:
+        shown = ", ".join(str(account_id) for account_id in missing[:20])
+        raise HTTPException(status_code=404, detail=f"Utility accounts not found ({len(missing)}): {shown}")
+    
+    # executemany with RETURNING: job ids come back in parameter order
+    rows = db.execute(
+        insert(IngestionJob).returning(
+            IngestionJob.id, IngestionJob.utility_account_id, sort_by_parameter_order=True
+        ),
+        [{"utility_account_id": account_id, "job_type": "FULL_PIPELINE", "status": "PENDING"} for account_id in account_ids],
+    ).all()
+    enqueue_job_messages(db, [
+        (row.id, row.utility_account_id, "FULL_PIPELINE", customers[row.utility_account_id]) for row in rows
+    ])
+    db.commit()
+    relay.wake()
+    
+    return {
+        "jobs": [{"job_id": row.id, "utility_account_id": row.utility_account_id} for row in rows],
+        "status": "PENDING",
+        "message": f"Created {len(rows)} jobs",
+    }
+
+
+def load_job_result(job_id: int) -> tuple:
+    """
+    Current state of an agent job, with its bill once it has SUCCEEDED.
+    
+    Returns (payload, final). `final` means the payload can never change: the
+    job SUCCEEDED and its bill is the row linked to it by job_id.
+    """
+    bill_columns = (
+        NormalizedBillSQL.billing_period_start,
+        NormalizedBillSQL.billing_period_end,
+        NormalizedBillSQL.total_amount,
+        # JSONB as text, embedded in the response as-is (never parsed in Python)
+        cast(NormalizedBillSQL.json_payload, Text).label("json_payload"),
+    )
+    with get_db() as db:
+        # Job and its own bill in one round-trip: primary key + unique job_id index
+        job = db.query(
+            IngestionJob.status, IngestionJob.error_message, IngestionJob.utility_account_id,
+            IngestionJob.updated_at, *bill_columns
+        ).outerjoin(NormalizedBillSQL, NormalizedBillSQL.job_id == IngestionJob.id).filter(
+            IngestionJob.id == job_id
+        ).first()
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        if job.status == "FAILED":
+            return {"job_id": job_id, "status": "FAILED", "error": job.error_message}, False
+        
+        if job.status != "SUCCEEDED":
+            return {"job_id": job_id, "status": job.status, "message": f"Job is {job.status}"}, False
+        
+        result, final = job, job.json_payload is not None
+        if not final:
+            # Jobs that finished before revision 0002 have no linked bill: use the account's
+            # latest unlinked (pre-0002) bill as of the job's completion
+            legacy = db.query(*bill_columns).filter(
+                NormalizedBillSQL.utility_account_id == job.utility_account_id,
+                NormalizedBillSQL.job_id.is_(None),
+            )
+            if job.updated_at is not None:
+                legacy = legacy.filter(NormalizedBillSQL.created_at <= job.updated_at)
+            result = legacy.order_by(NormalizedBillSQL.created_at.desc()).first()
+        
+        if not result:
+            return {"job_id": job_id, "status": "SUCCEEDED", "message": "No bill data"}, False
+        
+        return {
+            "job_id": job_id,
+            "status": "SUCCEEDED",
+            "result": {
+                "billing_period_start": str(result.billing_period_start),
+                "billing_period_end": str(result.billing_period_end),
+                "total_amount": result.total_amount,
+                "json_payload": orjson.Fragment(result.json_payload),
+            }
+        }, final
+
+
+async def fetch_result(job_id: int) -> CachedResult:
+    """Read a job's result from the DB; final and FAILED results are cached (see api.cache)."""
+    token = result_cache.token()
+    job, final = await run_in_threadpool(load_job_result, job_id)
+    # A FAILED job can be retried: only keep it while NOTIFY can evict it. A pre-0002
+    # fallback bill isn't final, so it is neither cached nor marked immutable
+    if final or (job["status"] == "FAILED" and notifier.listening):
+        return result_cache.put(job_id, job, token, final)
+    return CachedResult(job, None)
+
+
+def result_response(request: Request, result: CachedResult) -> Response:
+    """JSON response with caching headers; 304 when the client already has this version."""
+    status = result.payload["status"]
+    if status not in TERMINAL_STATUSES:
+        return ORJSONResponse(result.payload, headers={"Cache-Control": "no-store"})
+    
+    cache_control = f"private, max-age={RESULT_HTTP_MAX_AGE}, immutable" if result.final else "private, no-cache"
+    headers = {"ETag": result.etag or result_etag(result.payload), "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(result.payload, headers=headers)
 
 
 @app.get("/agent/result/{job_id}", response_model=AgentResultResponse)
-def agent_result(job_id: int, db: Session = Depends(get_db_dependency)):
-    """Get agent job result."""
-    job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+async def agent_result(request: Request, job_id: int, wait: float = Query(0, ge=0, le=JOB_WAIT_MAX_SECONDS)):
+    """
+    Get agent job result.
     
-    if job.status == "FAILED":
-        return {"job_id": job_id, "status": "FAILED", "error": getattr(job, "error_message", None)}
+    With ?wait=N the request is held for up to N seconds, until the job
+    SUCCEEDS or FAILS, and answers as soon as the worker commits. No DB
+    session is held while waiting. Finished results are served from memory
+    with an ETag (If-None-Match → 304).
+    """
+    cached = result_cache.get(job_id)
+    if cached:
+        return result_response(request, cached)
     
-    if job.status != "SUCCEEDED":
-        return {"job_id": job_id, "status": job.status, "message": f"Job is {job.status}"}
+    if not wait:
+        return result_response(request, await fetch_result(job_id))
     
-    result = db.query(NormalizedBillSQL).filter(
-        NormalizedBillSQL.utility_account_id == job.utility_account_id
-    ).order_by(NormalizedBillSQL.created_at.desc()).first()
+    deadline = time.monotonic() + wait
+    with notifier.subscribe(job_id) as subscription:
+        while True:
+            result = await fetch_result(job_id)
+            remaining = deadline - time.monotonic()
+            if result.payload["status"] in TERMINAL_STATUSES or remaining <= 0:
+                return result_response(request, result)
+            await wait_for_change(subscription, remaining)
+
 
+@app.get("/agent/events/{job_id}")
+async def agent_events(job_id: int):
+    """
+    Server-Sent Events stream for one job.
     
-    if not result:
-        return {"job_id": job_id, "status": "SUCCEEDED", "message": "No bill data"}
+    Sends a `status` event with the job's state now and after every change,
+    and closes after the SUCCEEDED/FAILED event (which carries the result).
+    """
+    subscription = notifier.subscribe(job_id)
+    try:
+        job, _ = await run_in_threadpool(load_job_result, job_id)  # 404 before the stream starts
+    except Exception:
+        subscription.close()
+        raise
     
-    return {
-        "job_id": job_id,
-        "status": "SUCCEEDED",
-        "result": {
-            "billing_period_start": str(result.billing_period_start),
-            "billing_period_end": str(result.billing_period_end),
-            "total_amount": result.total_amount,
-            "json_payload": result.json_payload,
-        }
-    }
+    async def stream():
+        nonlocal job
+        with subscription:
+            last_status = None
+            while True:
+                if job["status"] != last_status:
+                    last_status = job["status"]
+                    yield f"event: status\ndata: {orjson.dumps(job).decode()}\n\n"
+                if job["status"] in TERMINAL_STATUSES:
+                    return
+                if await wait_for_change(subscription, JOB_WAIT_POLL_SECONDS):
+                    job, _ = await run_in_threadpool(load_job_result, job_id)
+                else:
+                    yield ": keep-alive\n\n"
+    
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def wait_for_change(subscription, timeout: float) -> bool:
+    """
+    Wait for the job to (possibly) change. Returns True when it should be re-read.
+    
+    Normally that's a notification. While the notifier is disconnected, fall
+    back to re-reading every JOB_WAIT_POLL_SECONDS.
+    """
+    woken = await subscription.wait(min(timeout, JOB_WAIT_POLL_SECONDS))
+    return woken or not notifier.listening
@@ -0,0 +1,162 @@
+"""Job status push for the API: one LISTEN connection per instance.
+
+Workers NOTIFY on the job_status channel whenever a job's status changes (see
+shared.events). A listener thread receives these notifications and wakes the
+requests waiting on that job: ?wait= long-polls and /agent/events streams.
+Those requests then read the job once, instead of polling the database.
+Listeners (the result cache) hear about every job.
+
+If the LISTEN connection drops, waiters fall back to re-reading every
+JOB_WAIT_POLL_SECONDS until it reconnects. On reconnect every waiter is woken
+once, because notifications sent while disconnected are lost.
+"""
+import json
+import select
+import asyncio
+import logging
+import threading
+
+from shared import database
+from shared.events import JOB_STATUS_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Reconnect backoff for the LISTEN connection: 1s, 2s, 4s ... capped at 30s
+MAX_RECONNECT_DELAY_SECONDS = 30
+
+
+class Subscription:
+    """Wakes one waiting request when its job changes. Create and use on the event loop."""
+
+    def __init__(self, notifier: "JobNotifier", job_id: int):
+        self.notifier = notifier
+        self.job_id = job_id
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def wake(self):
+        """Thread-safe: called from the listener thread."""
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds. True if the job may have changed since the last wait."""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+    def close(self):
+        self.notifier._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JobNotifier:
+    """LISTENs for job status changes and fans them out to subscribers."""
+
+    def __init__(self):
+        self._subscribers = {}  # job_id -> set of Subscription
+        self._listeners = []  # callback(job_id), or callback(None) when changes may have been missed
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.listening = False
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="job-notifier", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def add_listener(self, callback):
+        """Call `callback(job_id)` on the listener thread for every status change."""
+        self._listeners.append(callback)
+
+    def subscribe(self, job_id: int) -> Subscription:
+        """Subscribe before reading the job, so a change between read and wait isn't missed."""
+        subscription = Subscription(self, job_id)
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subs = self._subscribers.get(subscription.job_id)
+            if subs:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[subscription.job_id]
+
+    def _dispatch(self, job_id: int):
+        for callback in self._listeners:
+            callback(job_id)
+        with self._lock:
+            subs = list(self._subscribers.get(job_id, ()))
+        for subscription in subs:
+            subscription.wake()
+
+    def _wake_all(self):
+        for callback in self._listeners:
+            callback(None)
+        with self._lock:
+            subs = [s for group in self._subscribers.values() for s in group]
+        for subscription in subs:
+            subscription.wake()
+
+    def _run(self):
+        delay = 1
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                if self.listening:
+                    delay = 1  # dropped after a good connection: retry quickly
+                logger.warning(f"Job notifier disconnected, retrying in {delay}s: {e}")
+            self.listening = False
+            # Changes made while disconnected will never be announced
+            for callback in self._listeners:
+                callback(None)
+            self._stop.wait(delay)
+            delay = min(MAX_RECONNECT_DELAY_SECONDS, delay * 2)
+
+    def _listen(self):
+        # Detached: the connection leaves the pool for good instead of holding a pool slot
+        fairy = database.engine.raw_connection()
+        fairy.detach()
+        conn = fairy.dbapi_connection
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {JOB_STATUS_CHANNEL}")
+            self.listening = True
+            logger.info(f"Listening for job status changes on '{JOB_STATUS_CHANNEL}'")
+            # Anything sent before LISTEN was missed; let waiters re-read once
+            self._wake_all()
+
+            while not self._stop.is_set():
+                if not select.select([conn], [], [], 1.0)[0]:
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notification = conn.notifies.pop(0)
+                    try:
+                        job_id = int(json.loads(notification.payload)["job_id"])
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning(f"Ignoring malformed job notification: {notification.payload!r}")
+                        continue
+                    self._dispatch(job_id)
+        finally:
+            conn.close()
+
+
+notifier = JobNotifier()
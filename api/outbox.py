@@ -0,0 +1,160 @@
+"""Transactional outbox for job messages.
+
+Endpoints write the job and its outbox row in one transaction, so a committed
+job always gets published eventually. A relay thread publishes unsent rows in
+batches and marks them sent. A crash between publish and mark can send a
+message twice; claim_job in the worker makes that harmless.
+"""
+import json
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import update, insert
+from sqlalchemy.orm import Session
+
+from shared import get_db, IngestionJob, PublishOutbox
+from shared.config import (
+    PUBLISH_OUTBOX_INTERVAL_MS, PUBLISH_OUTBOX_BATCH_SIZE, PUBLISH_OUTBOX_RETENTION_HOURS,
+    PUBLISH_OUTBOX_TIMEOUT_SECONDS,
+)
+from .pubsub import job_message, publish_payload
+
+logger = logging.getLogger(__name__)
+
+# Backoff for rows whose publish failed: 1s, 2s, 4s ... capped at 5 minutes
+MAX_RETRY_DELAY_SECONDS = 300
+# Sent rows are purged at most this often
+PURGE_INTERVAL_SECONDS = 3600
+
+
+def enqueue_job_message(db: Session, job: IngestionJob, customer_id: int = None) -> PublishOutbox:
+    """Add the job's outbox row to the session. The caller commits both together."""
+    if job.id is None:
+        db.flush()  # assigns job.id
+    message = job_message(job.id, job.utility_account_id, job.job_type, customer_id)
+    entry = PublishOutbox(job_id=job.id, payload=json.dumps(message))
+    db.add(entry)
+    return entry
+
+
+def enqueue_job_messages(db: Session, jobs: list):
+    """Bulk version of enqueue_job_message for (job_id, utility_account_id, job_type, customer_id) tuples."""
+    if not jobs:
+        return
+    db.execute(insert(PublishOutbox), [
+        {"job_id": job_id, "payload": json.dumps(job_message(job_id, utility_account_id, job_type, customer_id))}
+        for job_id, utility_account_id, job_type, customer_id in jobs
+    ])
+
+
+class OutboxRelay:
+    """Publishes unsent outbox rows; several API instances can run one each."""
+
+    def __init__(self, interval_ms: int = PUBLISH_OUTBOX_INTERVAL_MS, batch_size: int = PUBLISH_OUTBOX_BATCH_SIZE):
+        self.interval = interval_ms / 1000
+        self.batch_size = batch_size
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+        self.published = 0
+        self.failed = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="publish-outbox", daemon=True)
+        self._thread.start()
+        return self
+
+    def wake(self):
+        """Publish now instead of at the next interval (call after committing new rows)."""
+        self._wake.set()
+
+    def stop(self, timeout: float = 10.0):
+        """Publish what is pending, then stop."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"published": self.published, "failed": self.failed}
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # Keep going while full batches come back
+                while self.relay_once() >= self.batch_size:
+                    pass
+                self._purge_sent()
+            except Exception as e:
+                logger.error(f"Publish outbox relay failed: {e}")
+            if self._stop.is_set():
+                return
+
+    def relay_once(self) -> int:
+        """Publish one batch of due rows. Returns how many were published."""
+        now = datetime.utcnow()
+        with get_db() as db:
+            # SKIP LOCKED: concurrent relays split the rows instead of double-publishing
+            entries = db.query(PublishOutbox.id, PublishOutbox.payload, PublishOutbox.attempts).filter(
+                PublishOutbox.sent_at.is_(None),
+                PublishOutbox.next_attempt_at <= now,
+            ).order_by(PublishOutbox.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+            if not entries:
+                return 0
+
+            # Publish everything first; the client batches them into few RPCs
+            futures = [(entry, publish_payload(entry.payload)) for entry in entries]
+            # The rows stay locked until we commit: give the whole batch one deadline, and
+            # back off whatever hasn't been acknowledged by then (a late publish is a duplicate)
+            deadline = time.monotonic() + PUBLISH_OUTBOX_TIMEOUT_SECONDS
+            sent_ids = []
+            for entry, future in futures:
+                try:
+                    future.result(timeout=max(0, deadline - time.monotonic()))
+                    sent_ids.append(entry.id)
+                except Exception as e:
+                    self.failed += 1
+                    error = str(e) or type(e).__name__  # a timeout has no message
+                    delay = min(MAX_RETRY_DELAY_SECONDS, 2 ** entry.attempts)
+                    db.execute(
+                        update(PublishOutbox)
+                        .where(PublishOutbox.id == entry.id)
+                        .values(
+                            attempts=PublishOutbox.attempts + 1,
+                            last_error=error[:500],
+                            next_attempt_at=now + timedelta(seconds=delay),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    logger.warning(f"Publish of outbox row {entry.id} failed: {error}")
+
+            if sent_ids:
+                db.execute(
+                    update(PublishOutbox)
+                    .where(PublishOutbox.id.in_(sent_ids))
+                    .values(sent_at=datetime.utcnow())
+                    .execution_options(synchronize_session=False)
+                )
+        self.published += len(sent_ids)
+        return len(sent_ids)
+
+    def _purge_sent(self):
+        if time.monotonic() - self._last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(hours=PUBLISH_OUTBOX_RETENTION_HOURS)
+        with get_db() as db:
+            deleted = db.query(PublishOutbox).filter(
+                PublishOutbox.sent_at.isnot(None),
+                PublishOutbox.sent_at < cutoff,
+            ).delete(synchronize_session=False)
+        if deleted:
+            logger.info(f"Purged {deleted} sent outbox rows")
+
+
+relay = OutboxRelay()
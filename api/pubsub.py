@@ -1,14 +1,34 @@
 """Pub/Sub publisher helper."""
-import json
-from google.cloud import pubsub_v1
-from shared.config import GCP_PROJECT, PUBSUB_TOPIC
+import threading
+from shared.config import (
+    GCP_PROJECT, PUBSUB_TOPIC,
+    PUBSUB_BATCH_MAX_MESSAGES, PUBSUB_BATCH_MAX_BYTES, PUBSUB_BATCH_MAX_LATENCY_MS,
+)
 
-publisher = pubsub_v1.PublisherClient()
-topic_path = publisher.topic_path(GCP_PROJECT, PUBSUB_TOPIC)
+_publisher = None
+_topic_path = None
+_publisher_lock = threading.Lock()
 
 
-def publish_job(job_id: int, utility_account_id: int, job_type: str, customer_id: int = None) -> str:
-    """Publish a job message to Pub/Sub."""
+def get_publisher():
+    """Pub/Sub publisher and topic path, created on first publish."""
+    global _publisher, _topic_path
+    with _publisher_lock:
+        if _publisher is None:
+            from google.cloud import pubsub_v1
+            # Messages published close together share one Publish RPC
+            batch_settings = pubsub_v1.types.BatchSettings(
+                max_messages=PUBSUB_BATCH_MAX_MESSAGES,
+                max_bytes=PUBSUB_BATCH_MAX_BYTES,
+                max_latency=PUBSUB_BATCH_MAX_LATENCY_MS / 1000,
+            )
+            _publisher = pubsub_v1.PublisherClient(batch_settings=batch_settings)
+            _topic_path = _publisher.topic_path(GCP_PROJECT, PUBSUB_TOPIC)
+        return _publisher, _topic_path
+
+
+def job_message(job_id: int, utility_account_id: int, job_type: str, customer_id: int = None) -> dict:
+    """The message a worker receives for a job."""
     message = {
         "job_id": job_id,
         "utility_account_id": utility_account_id,
@@ -16,7 +36,10 @@ def publish_job(job_id: int, utility_account_id: int, job_type: str, customer_id
     }
     if customer_id is not None:
         message["customer_id"] = customer_id
-    
-    data = json.dumps(message).encode("utf-8")
-    future = publisher.publish(topic_path, data)
-    return future.result()
+    return message
+
+
+def publish_payload(payload: str):
+    """Publish an encoded message without waiting. Returns the publish future."""
+    publisher, topic_path = get_publisher()
+    return publisher.publish(topic_path, payload.encode("utf-8"))
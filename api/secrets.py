@@ -1,14 +1,25 @@
 """Secret Manager helper."""
-from google.cloud import secretmanager
+import threading
 from shared.config import GCP_PROJECT, SECRET_NAME
 
-client = secretmanager.SecretManagerServiceClient()
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Secret Manager client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google.cloud import secretmanager
+            _client = secretmanager.SecretManagerServiceClient()
+        return _client
 
 
 def get_secret(secret_id: str = SECRET_NAME) -> str:
     """Access a secret from Secret Manager."""
     name = f"projects/{GCP_PROJECT}/secrets/{secret_id}/versions/latest"
-    response = client.access_secret_version(request={"name": name})
+    response = get_client().access_secret_version(request={"name": name})
     return response.payload.data.decode("UTF-8")
 
 
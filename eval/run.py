@@ -1,12 +1,15 @@
 #!/usr/bin/env python
 """LLM Extraction Evaluation - measures accuracy against test cases."""
+import argparse
 import json
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from worker.llm import extract_bill_data
+from worker.llm import extract_bills_batch
+from worker.preprocess import estimate_tokens, prepare_bill_text
+from shared.config import LLM_BATCH_CONCURRENCY, LLM_MAX_INPUT_TOKENS
 from shared.schemas import BillNormalized
 
 EVAL_DIR = Path(__file__).parent
@@ -14,16 +17,14 @@ BILLS_DIR = EVAL_DIR / "bills"
 EXPECTED_FILE = EVAL_DIR / "expected.json"
 
 
-def evaluate_bill(bill_path: Path, expected: dict) -> dict:
-    """Evaluate LLM extraction against expected values."""
-    with open(bill_path) as f:
-        bill_text = f.read()
-    
-    result = {"file": bill_path.name, "passed": True, "errors": []}
+def evaluate_bill(bill_name: str, extraction: dict, expected: dict) -> dict:
+    """Evaluate one batch extraction result against expected values."""
+    result = {"file": bill_name, "passed": True, "errors": []}
     
     try:
-        extracted = extract_bill_data(bill_text)
-        validated = BillNormalized(**extracted)
+        if extraction["error"]:
+            raise Exception(extraction["error"])
+        validated = BillNormalized(**extraction["data"])
         
         # Check total (1% tolerance)
         if abs(validated.total_amount - expected["total_amount"]) > expected["total_amount"] * 0.01:
@@ -48,16 +49,16 @@ def evaluate_bill(bill_path: Path, expected: dict) -> dict:
     return result
 
 
-def main():
-    with open(EXPECTED_FILE) as f:
-        expected = json.load(f)
+def run_eval(cases: list, bills: list, args, compact: bool) -> int:
+    """Extract and score every bill. Returns the number that passed."""
+    # Eval measures the model, so always bypass the extraction cache
+    extractions = extract_bills_batch(
+        bills, max_concurrency=args.concurrency, pack_size=args.pack_size, use_cache=False, compact=compact
+    )
     
     results = []
-    for bill_file, exp in expected.items():
-        bill_path = BILLS_DIR / bill_file
-        if not bill_path.exists():
-            continue
-        result = evaluate_bill(bill_path, exp)
+    for (bill_file, exp), extraction in zip(cases, extractions):
+        result = evaluate_bill(bill_file, extraction, exp)
         results.append(result)
         
         status = "PASS" if result["passed"] else "FAIL"
@@ -68,10 +69,37 @@ def main():
             print(f" - {result['errors'][0]}", end="")
         print()
     
-    passed = sum(1 for r in results if r["passed"])
-    print(f"\nResult: {passed}/{len(results)}")
-    return 0 if passed == len(results) else 1
+    return sum(1 for r in results if r["passed"])
 
 
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=LLM_BATCH_CONCURRENCY, help="Max concurrent LLM calls")
+    parser.add_argument("--pack-size", type=int, default=1, help="Bills per prompt (1 = one call per bill)")
+    parser.add_argument("--no-compact", action="store_true", help="Send raw bill text to the LLM")
+    parser.add_argument("--compare", action="store_true", help="Run raw and compacted prompts and compare")
+    args = parser.parse_args()
+    
+    with open(EXPECTED_FILE) as f:
+        expected = json.load(f)
+    
+    cases = [(name, exp) for name, exp in expected.items() if (BILLS_DIR / name).exists()]
+    bills = [((BILLS_DIR / name).read_text(), None) for name, _ in cases]
+    
+    raw_tokens = sum(estimate_tokens(text) for text, _ in bills)
+    compact_tokens = sum(estimate_tokens(prepare_bill_text(text, LLM_MAX_INPUT_TOKENS)) for text, _ in bills)
+    print(f"Bill tokens: raw ~{raw_tokens}, compacted ~{compact_tokens} ({compact_tokens / raw_tokens:.0%})\n")
+    
+    modes = [False, True] if args.compare else [not args.no_compact]
+    all_passed = True
+    for compact in modes:
+        label = "compacted" if compact else "raw"
+        print(f"== {label} ==")
+        passed = run_eval(cases, bills, args, compact)
+        print(f"Result ({label}): {passed}/{len(cases)}\n")
+        all_passed = all_passed and passed == len(cases)
+    
+    return 0 if all_passed else 1
+
 if __name__ == "__main__":
     exit(main())
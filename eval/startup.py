@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""Cold start benchmark - import time and first-request latency for the API and worker.
+
+Every measurement runs in a fresh interpreter, so nothing is cached between runs.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Probes print a JSON dict of millisecond timings on their last line
+IMPORT_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+print(json.dumps({{"import_ms": (time.perf_counter() - t0) * 1000}}))
+"""
+
+# Clients a worker's first job touches, created after import (no network calls)
+WORKER_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import worker.main
+t1 = time.perf_counter()
+from worker.storage import get_storage
+from worker.bigquery import get_client
+from worker.llm import get_model
+get_storage(); t2 = time.perf_counter()
+get_client(); t3 = time.perf_counter()
+get_model(); t4 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "storage_client_ms": (t2 - t1) * 1000,
+    "bigquery_client_ms": (t3 - t2) * 1000,
+    "vertexai_model_ms": (t4 - t3) * 1000,
+    "first_job_ready_ms": (t4 - t0) * 1000,
+}))
+"""
+
+
+def run_probe(code: str) -> dict:
+    """Run a probe in a fresh interpreter and return its timings."""
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def interpreter_startup() -> dict:
+    """Baseline: a bare `python -c pass`, included in every other number."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return {"startup_ms": (time.perf_counter() - start) * 1000}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(timeout: float = 60.0) -> dict:
+    """Spawn uvicorn and time process start → first successful GET /health."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        ready = time.perf_counter()
+                        break
+            except OSError:
+                time.sleep(0.01)
+        else:
+            raise TimeoutError(f"/health not ready after {timeout}s")
+
+        # Second request shows the steady-state latency to compare against
+        t0 = time.perf_counter()
+        urllib.request.urlopen(url, timeout=5).close()
+        warm = time.perf_counter() - t0
+        return {"first_request_ms": (ready - start) * 1000, "warm_request_ms": warm * 1000}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def slowest_imports(module: str, top: int) -> list:
+    """Top modules by cumulative import time, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def summarize(samples: list) -> dict:
+    """Median/min/max per metric across runs."""
+    return {
+        key: {
+            "median": round(statistics.median(s[key] for s in samples), 1),
+            "min": round(min(s[key] for s in samples), 1),
+            "max": round(max(s[key] for s in samples), 1),
+        }
+        for key in samples[0]
+    }
+
+
+def bench_api(runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        sample = run_probe(IMPORT_PROBE.format(module="api.main"))
+        sample.update(time_to_first_request())
+        samples.append(sample)
+    return summarize(samples)
+
+
+def bench_worker(runs: int) -> dict:
+    return summarize([run_probe(WORKER_PROBE) for _ in range(runs)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--target", choices=["api", "worker", "all"], default="all")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Also list the N slowest imports per target")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    targets = ["api", "worker"] if args.target == "all" else [args.target]
+    # Keep the benchmark off the DB: the API's startup hook would otherwise create tables
+    os.environ.setdefault("DB_INIT_ON_STARTUP", "false")
+
+    results = {"interpreter": summarize([interpreter_startup() for _ in range(args.runs)])}
+    for target in targets:
+        results[target] = bench_api(args.runs) if target == "api" else bench_worker(args.runs)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"Cold start ({args.runs} runs, median [min-max] ms)")
+        for target, metrics in results.items():
+            print(f"\n{target}")
+            for metric, value in metrics.items():
+                print(f"  {metric:<22} {value['median']:>8} [{value['min']}-{value['max']}]")
+
+    if args.importtime:
+        for target in targets:
+            module = "api.main" if target == "api" else "worker.main"
+            print(f"\nSlowest imports: {module}")
+            for ms, name in slowest_imports(module, args.importtime):
+                print(f"  {ms:>8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,46 @@
+"""Alembic environment: runs migrations against shared.database's engine."""
+import logging
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import text
+
+from shared.config import DATABASE_URL
+from shared.database import Base
+from shared import orm_models  # noqa: F401 - registers the models on Base.metadata (autogenerate)
+
+target_metadata = Base.metadata
+
+# Log to the console under the alembic CLI; inside the API (init_db) keep its logging as is
+if context.config.config_file_name and not logging.getLogger().handlers:
+    fileConfig(context.config.config_file_name, disable_existing_loggers=False)
+
+# Session-level advisory lock: API instances starting together migrate one at a time
+MIGRATION_LOCK_KEY = 7310421
+
+
+def run_migrations_offline():
+    """Emit SQL instead of running it (`alembic upgrade head --sql`)."""
+    context.configure(url=DATABASE_URL, target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    from shared.database import engine
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.commit()
+        try:
+            context.configure(connection=connection, target_metadata=target_metadata)
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            connection.commit()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
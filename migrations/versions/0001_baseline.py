@@ -0,0 +1,134 @@
+"""Baseline: the schema init_db() used to create with Base.metadata.create_all.
+
+Safe on databases that create_all already built: tables and indexes that exist
+are skipped, and columns create_all never added to an existing table
+(artifacts/normalized_bills_sql.content_hash) are added, so existing
+deployments just run `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def create_table_if_missing(name: str, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def add_column_if_missing(table: str, column: sa.Column):
+    existing = {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+    if column.name not in existing:
+        op.add_column(table, column)
+
+
+def upgrade():
+    create_table_if_missing(
+        "customers",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String, nullable=False),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "utility_accounts",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("customer_id", sa.Integer, sa.ForeignKey("customers.id"), nullable=False),
+        sa.Column("provider", sa.String, nullable=False),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "ingestion_jobs",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("utility_account_id", sa.Integer, sa.ForeignKey("utility_accounts.id"), nullable=False),
+        sa.Column("job_type", sa.String, nullable=False),
+        sa.Column("status", sa.String),
+        sa.Column("error_message", sa.String),
+        sa.Column("attempt_count", sa.Integer),
+        sa.Column("updated_at", sa.DateTime),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "artifacts",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("job_id", sa.Integer, sa.ForeignKey("ingestion_jobs.id"), nullable=False),
+        sa.Column("utility_account_id", sa.Integer, sa.ForeignKey("utility_accounts.id"), nullable=False),
+        sa.Column("gcs_path", sa.String, nullable=False),
+        sa.Column("artifact_type", sa.String, nullable=False),
+        sa.Column("content_hash", sa.String(64)),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "normalized_bills_sql",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("customer_id", sa.Integer, sa.ForeignKey("customers.id"), nullable=False),
+        sa.Column("utility_account_id", sa.Integer, sa.ForeignKey("utility_accounts.id"), nullable=False),
+        sa.Column("billing_period_start", sa.String, nullable=False),
+        sa.Column("billing_period_end", sa.String, nullable=False),
+        sa.Column("total_amount", sa.Float, nullable=False),
+        sa.Column("json_payload", sa.String, nullable=False),
+        sa.Column("content_hash", sa.String(64)),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "llm_extraction_cache",
+        sa.Column("cache_key", sa.String(64), primary_key=True),
+        sa.Column("provider", sa.String),
+        sa.Column("prompt_version", sa.String, nullable=False),
+        sa.Column("model_name", sa.String, nullable=False),
+        sa.Column("payload", sa.String, nullable=False),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "bigquery_outbox",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("table_name", sa.String, nullable=False),
+        sa.Column("row_id", sa.String, nullable=False),
+        sa.Column("payload", sa.String, nullable=False),
+        sa.Column("attempts", sa.Integer),
+        sa.Column("last_error", sa.String),
+        sa.Column("next_attempt_at", sa.DateTime),
+        sa.Column("created_at", sa.DateTime),
+    )
+    create_table_if_missing(
+        "publish_outbox",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("job_id", sa.Integer, sa.ForeignKey("ingestion_jobs.id"), nullable=False),
+        sa.Column("payload", sa.String, nullable=False),
+        sa.Column("attempts", sa.Integer),
+        sa.Column("last_error", sa.String),
+        sa.Column("next_attempt_at", sa.DateTime),
+        sa.Column("sent_at", sa.DateTime),
+        sa.Column("created_at", sa.DateTime),
+    )
+
+    # Tables from before content addressing were never given the column by create_all
+    add_column_if_missing("artifacts", sa.Column("content_hash", sa.String(64)))
+    add_column_if_missing("normalized_bills_sql", sa.Column("content_hash", sa.String(64)))
+
+    # create_all never added indexes to tables that already existed, so check each one
+    op.create_index("ix_utility_accounts_customer_id", "utility_accounts", ["customer_id"], if_not_exists=True)
+    op.create_index("ix_ingestion_jobs_created", "ingestion_jobs", ["created_at", "id"], if_not_exists=True)
+    op.create_index("ix_ingestion_jobs_status_created", "ingestion_jobs", ["status", "created_at", "id"], if_not_exists=True)
+    op.create_index("ix_ingestion_jobs_account_created", "ingestion_jobs", ["utility_account_id", "created_at", "id"], if_not_exists=True)
+    op.create_index("ix_artifacts_content_hash", "artifacts", ["content_hash"], if_not_exists=True)
+    op.create_index("ix_normalized_bills_sql_content_hash", "normalized_bills_sql", ["content_hash"], if_not_exists=True)
+    op.create_index("ix_llm_extraction_cache_created_at", "llm_extraction_cache", ["created_at"], if_not_exists=True)
+    op.create_index("ix_bigquery_outbox_next_attempt_at", "bigquery_outbox", ["next_attempt_at"], if_not_exists=True)
+    op.create_index("ix_publish_outbox_job_id", "publish_outbox", ["job_id"], if_not_exists=True)
+    op.create_index(
+        "ix_publish_outbox_unsent", "publish_outbox", ["next_attempt_at"],
+        postgresql_where=sa.text("sent_at IS NULL"), if_not_exists=True,
+    )
+
+
+def downgrade():
+    for table in ("publish_outbox", "bigquery_outbox", "llm_extraction_cache", "normalized_bills_sql",
+                  "artifacts", "ingestion_jobs", "utility_accounts", "customers"):
+        op.drop_table(table)
@@ -0,0 +1,40 @@
+"""Link normalized bills to the job that wrote them; index the result lookups.
+
+Indexes are built CONCURRENTLY so a large normalized_bills_sql keeps taking
+writes while they build. Bills written before this migration keep job_id NULL
+(agent_result falls back to the account's latest bill for those).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "normalized_bills_sql",
+        sa.Column("job_id", sa.Integer, sa.ForeignKey("ingestion_jobs.id"), nullable=True),
+    )
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_normalized_bills_sql_job_id", "normalized_bills_sql", ["job_id"],
+            unique=True, postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.create_index(
+            "ix_normalized_bills_sql_account_created", "normalized_bills_sql", ["utility_account_id", "created_at"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_normalized_bills_sql_account_created", table_name="normalized_bills_sql")
+    op.drop_index("ix_normalized_bills_sql_job_id", table_name="normalized_bills_sql")
+    op.drop_column("normalized_bills_sql", "job_id")
@@ -0,0 +1,41 @@
+"""Store normalized bill payloads as JSONB and index them for containment queries.
+
+The type change rewrites normalized_bills_sql under an ACCESS EXCLUSIVE lock;
+on a large table run it in a maintenance window. The GIN index is then built
+CONCURRENTLY.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.alter_column(
+        "normalized_bills_sql", "json_payload",
+        type_=JSONB, existing_type=sa.String, existing_nullable=False,
+        postgresql_using="json_payload::jsonb",
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_normalized_bills_sql_payload", "normalized_bills_sql", ["json_payload"],
+            postgresql_using="gin", postgresql_ops={"json_payload": "jsonb_path_ops"},
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade():
+    op.drop_index("ix_normalized_bills_sql_payload", table_name="normalized_bills_sql")
+    op.alter_column(
+        "normalized_bills_sql", "json_payload",
+        type_=sa.String, existing_type=JSONB, existing_nullable=False,
+        postgresql_using="json_payload::text",
+    )
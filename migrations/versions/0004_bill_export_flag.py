@@ -0,0 +1,29 @@
+"""Record whether a normalized bill is exported to BigQuery.
+
+A job's copy of a bill its account already has is kept out of BigQuery by the
+streaming sink; the backfill now reads the same flag instead of exporting every
+row. Existing rows default to true (adding a column with a constant default
+doesn't rewrite the table).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "normalized_bills_sql",
+        sa.Column("export_to_bigquery", sa.Boolean, nullable=False, server_default=sa.true()),
+    )
+
+
+def downgrade():
+    op.drop_column("normalized_bills_sql", "export_to_bigquery")
@@ -20,6 +20,10 @@ source venv/bin/activate
 echo ">>> Installing requirements..."
 pip install -r requirements.txt
 
-# 4. Start Application
+# 4. Migrate Schema
+echo ">>> Running database migrations..."
+alembic upgrade head
+
+# 5. Start Application
 echo -e "${GREEN}>>> Starting API... (Press Ctrl+C to stop)${NC}"
 uvicorn api.main:app --reload
@@ -3,11 +3,18 @@ from .schemas import (
     CustomerCreate,
     UtilityAccountCreate,
     IngestRunRequest,
+    AgentRunBatchRequest,
+    JobLookupRequest,
     # Responses
     HealthResponse,
     CustomerResponse,
     UtilityAccountResponse,
     JobResponse,
+    BatchJob,
+    AgentRunBatchResponse,
+    JobStatus,
+    JobPage,
+    JobLookupResponse,
     BillResult,
     AgentResultResponse,
     # Data
@@ -15,5 +22,5 @@ from .schemas import (
     BillNormalized,
 )
 from .config import GCP_PROJECT, DATABASE_URL, PUBSUB_TOPIC, PUBSUB_SUBSCRIPTION, GCS_BUCKET, BQ_DATASET, SECRET_NAME, MAX_JOB_ATTEMPTS
-from .database import get_db, get_db_dependency, Base, engine
-from .orm_models import Customer, UtilityAccount, IngestionJob, Artifact, NormalizedBillSQL
+from .database import get_db, get_db_dependency, Base, configure_engine, init_db, pool_stats
+from .orm_models import Customer, UtilityAccount, IngestionJob, Artifact, NormalizedBillSQL, LLMExtractionCache, BigQueryOutbox, PublishOutbox
@@ -1,5 +1,6 @@
 """Shared configuration - loads from .env or environment."""
 import os
+import json
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -7,28 +8,165 @@ from dotenv import load_dotenv
 PROJECT_ROOT = Path(__file__).parent.parent
 load_dotenv(PROJECT_ROOT / ".env")
 
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
 # GCP
 GCP_PROJECT = os.getenv("GCP_PROJECT")
 GCP_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Run schema migrations (alembic upgrade head) when the API starts. Off by default
+# so cold starts never wait on migrations: deploys run `alembic upgrade head` as
+# a release step, and run_dev.sh runs it before starting the API.
+DB_INIT_ON_STARTUP = _env_bool("DB_INIT_ON_STARTUP", False)
 
 # Pub/Sub
 PUBSUB_TOPIC = os.getenv("PUBSUB_TOPIC")
 PUBSUB_SUBSCRIPTION = os.getenv("PUBSUB_SUBSCRIPTION")
+# Publisher batching: messages are held up to this long to share one Publish RPC
+PUBSUB_BATCH_MAX_MESSAGES = int(os.getenv("PUBSUB_BATCH_MAX_MESSAGES", "100"))
+PUBSUB_BATCH_MAX_BYTES = int(os.getenv("PUBSUB_BATCH_MAX_BYTES", str(1024 * 1024)))
+PUBSUB_BATCH_MAX_LATENCY_MS = int(os.getenv("PUBSUB_BATCH_MAX_LATENCY_MS", "10"))
+# Job message outbox (api.outbox): the relay polls this often and is also woken on every new job
+PUBLISH_OUTBOX_INTERVAL_MS = int(os.getenv("PUBLISH_OUTBOX_INTERVAL_MS", "1000"))
+PUBLISH_OUTBOX_BATCH_SIZE = int(os.getenv("PUBLISH_OUTBOX_BATCH_SIZE", "500"))
+PUBLISH_OUTBOX_RETENTION_HOURS = int(os.getenv("PUBLISH_OUTBOX_RETENTION_HOURS", "24"))
+# Max seconds the relay waits for a batch's publishes while it holds the rows' locks
+PUBLISH_OUTBOX_TIMEOUT_SECONDS = int(os.getenv("PUBLISH_OUTBOX_TIMEOUT_SECONDS", "30"))
+# Max utility accounts per POST /agent/run-batch request
+AGENT_BATCH_MAX_ACCOUNTS = int(os.getenv("AGENT_BATCH_MAX_ACCOUNTS", "10000"))
+# GET /agent/result?wait= upper bound; waiters re-read this often only while LISTEN is down
+# (also the /agent/events keep-alive interval)
+JOB_WAIT_MAX_SECONDS = int(os.getenv("JOB_WAIT_MAX_SECONDS", "60"))
+JOB_WAIT_POLL_SECONDS = int(os.getenv("JOB_WAIT_POLL_SECONDS", "5"))
+# GET /jobs page size cap, and max ids per POST /jobs/lookup
+JOBS_PAGE_MAX = int(os.getenv("JOBS_PAGE_MAX", "1000"))
+JOBS_LOOKUP_MAX_IDS = int(os.getenv("JOBS_LOOKUP_MAX_IDS", "10000"))
+# In-process cache of finished /agent/result responses (api.cache)
+RESULT_CACHE_ENABLED = _env_bool("RESULT_CACHE_ENABLED", True)
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+# Cache-Control max-age for SUCCEEDED results (they never change)
+RESULT_HTTP_MAX_AGE = int(os.getenv("RESULT_HTTP_MAX_AGE", "86400"))
+
+# Artifact storage: "gcs" (GCS_BUCKET) or "local" (files under STORAGE_LOCAL_ROOT)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gcs")
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "./data/artifacts")
 
 # GCS
 GCS_BUCKET = os.getenv("GCS_BUCKET")
+# Objects at or above this size are streamed in chunks (and gzipped if enabled)
+STORAGE_STREAM_THRESHOLD = int(os.getenv("STORAGE_STREAM_THRESHOLD", str(1024 * 1024)))
+# Resumable upload chunk size; GCS requires a multiple of 256 KiB
+STORAGE_CHUNK_SIZE = int(os.getenv("STORAGE_CHUNK_SIZE", str(8 * 1024 * 1024)))
+STORAGE_COMPRESS = _env_bool("STORAGE_COMPRESS", True)
 
 # BigQuery
 BQ_DATASET = os.getenv("BQ_DATASET")
+# Micro-batched streaming inserts (worker.bigquery.BigQueryBatchWriter)
+BQ_BATCH_ENABLED = _env_bool("BQ_BATCH_ENABLED", True)
+# "enqueue": jobs return once the row is queued (spooled if BQ_SPOOL_DIR is set);
+# "flush": jobs wait until the row's batch is written
+BQ_BATCH_WAIT = os.getenv("BQ_BATCH_WAIT", "enqueue")
+BQ_BATCH_MAX_ROWS = int(os.getenv("BQ_BATCH_MAX_ROWS", "500"))
+# insertAll requests are capped at 10 MB
+BQ_BATCH_MAX_BYTES = int(os.getenv("BQ_BATCH_MAX_BYTES", str(5 * 1024 * 1024)))
+BQ_BATCH_MAX_LATENCY_MS = int(os.getenv("BQ_BATCH_MAX_LATENCY_MS", "1000"))
+BQ_BATCH_MAX_RETRIES = int(os.getenv("BQ_BATCH_MAX_RETRIES", "5"))
+# Local directory for the durable enqueue spool. Empty = in-memory queue only: with
+# BQ_BATCH_WAIT=enqueue a crash then loses rows of jobs already marked SUCCEEDED
+BQ_SPOOL_DIR = os.getenv("BQ_SPOOL_DIR", "./data/bq-spool")
+# BigQuery outbox: rows that failed to stream, retried by a relay thread in each worker
+BQ_OUTBOX_INTERVAL = int(os.getenv("BQ_OUTBOX_INTERVAL", "30"))
+BQ_OUTBOX_BATCH_SIZE = int(os.getenv("BQ_OUTBOX_BATCH_SIZE", "500"))
+# Bulk backfill (python -m worker.backfill): rows per NDJSON shard / load job
+BQ_BACKFILL_SHARD_ROWS = int(os.getenv("BQ_BACKFILL_SHARD_ROWS", "500000"))
+BQ_BACKFILL_FETCH_SIZE = int(os.getenv("BQ_BACKFILL_FETCH_SIZE", "5000"))
+BQ_BACKFILL_MAX_PENDING_LOADS = int(os.getenv("BQ_BACKFILL_MAX_PENDING_LOADS", "4"))
 
 # Secret Manager
 SECRET_NAME = os.getenv("SECRET_NAME")
 
 # Job settings
 MAX_JOB_ATTEMPTS = 3
+# A RUNNING job whose worker stopped updating it for this long can be reclaimed
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+
+# LLM extraction cache (in-process LRU + Postgres table)
+LLM_CACHE_ENABLED = _env_bool("LLM_CACHE_ENABLED", True)
+LLM_CACHE_PERSISTENT = _env_bool("LLM_CACHE_PERSISTENT", True)
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# How often each worker deletes expired cache rows (0 disables)
+LLM_CACHE_PURGE_INTERVAL = int(os.getenv("LLM_CACHE_PURGE_INTERVAL", "3600"))
+
+# Vertex AI client-side rate limits, per worker process.
+# "default" applies to every model; override per model with
+# LLM_RATE_LIMITS_JSON='{"gemini-2.0-flash-001": {"rpm": 600, "max_concurrency": 64}}'
+LLM_RATE_LIMITS = {
+    "default": {
+        "rpm": int(os.getenv("LLM_RPM", "300")),
+        "tpm": int(os.getenv("LLM_TPM", "1000000")),
+        "initial_concurrency": int(os.getenv("LLM_INITIAL_CONCURRENCY", "4")),
+        "min_concurrency": int(os.getenv("LLM_MIN_CONCURRENCY", "1")),
+        "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "32")),
+        # Retries inside the call for 429/503, before the job is failed
+        "max_retries": int(os.getenv("LLM_THROTTLE_RETRIES", "3")),
+    },
+    **json.loads(os.getenv("LLM_RATE_LIMITS_JSON", "{}")),
+}
+
+# Prompt compaction: strip decoration/boilerplate and cap input size
+LLM_COMPACT_PROMPTS = _env_bool("LLM_COMPACT_PROMPTS", True)
+LLM_MAX_INPUT_TOKENS = int(os.getenv("LLM_MAX_INPUT_TOKENS", "8000"))
+
+# Batch LLM extraction (worker.llm.extract_bills_batch)
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", "8"))
+# Only bills up to this size are packed several to a prompt
+LLM_PACK_MAX_CHARS = int(os.getenv("LLM_PACK_MAX_CHARS", "4000"))
+
+# Worker concurrency
+# Jobs are mostly network wait (Vertex AI, GCS, SQL), so run several per process.
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "8"))
+# Pub/Sub flow control: max leased messages/bytes held by one worker process
+WORKER_MAX_MESSAGES = int(os.getenv("WORKER_MAX_MESSAGES", str(WORKER_CONCURRENCY)))
+WORKER_MAX_BYTES = int(os.getenv("WORKER_MAX_BYTES", str(10 * 1024 * 1024)))
+
+# Asyncio worker (python -m worker.aio)
+WORKER_ASYNC_CONCURRENCY = int(os.getenv("WORKER_ASYNC_CONCURRENCY", "200"))
+# Threads for blocking SQL/GCS/BigQuery calls made from the event loop
+WORKER_IO_THREADS = int(os.getenv("WORKER_IO_THREADS", "32"))
+WORKER_ACK_DEADLINE = int(os.getenv("WORKER_ACK_DEADLINE", "60"))
+
+# Worker supervisor (python -m worker.supervisor)
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+WORKER_SHUTDOWN_TIMEOUT = int(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "60"))
+
+# Database connection pools, one profile per process type.
+# Env vars are prefixed with the profile name, e.g. WORKER_DB_POOL_SIZE.
+def _db_pool_profile(prefix: str, pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_size": int(os.getenv(f"{prefix}_DB_POOL_SIZE", str(pool_size))),
+        "max_overflow": int(os.getenv(f"{prefix}_DB_MAX_OVERFLOW", str(max_overflow))),
+        "pool_timeout": int(os.getenv(f"{prefix}_DB_POOL_TIMEOUT", "30")),
+        # Cloud SQL drops idle connections; recycle before that happens
+        "pool_recycle": int(os.getenv(f"{prefix}_DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool(f"{prefix}_DB_POOL_PRE_PING", True),
+    }
+
+DB_POOL_PROFILES = {
+    "api": _db_pool_profile("API", pool_size=5, max_overflow=10),
+    # Every concurrent job may hold a connection
+    "worker": _db_pool_profile("WORKER", pool_size=WORKER_CONCURRENCY, max_overflow=4),
+    # worker.aio: every I/O thread may hold a connection
+    "worker_aio": _db_pool_profile("WORKER_AIO", pool_size=WORKER_IO_THREADS, max_overflow=4),
+}
+# Seconds between DB pool stats log lines in the worker (0 disables)
+DB_POOL_LOG_INTERVAL = int(os.getenv("DB_POOL_LOG_INTERVAL", "60"))
 
 # Set credentials path for GCP SDK
 if GCP_CREDENTIALS:
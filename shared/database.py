@@ -1,15 +1,122 @@
 """Shared database utilities with context manager."""
+import time
+import threading
 from contextlib import contextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
-from .config import DATABASE_URL
+from .config import PROJECT_ROOT, DATABASE_URL, DB_POOL_PROFILES
 
-engine = create_engine(DATABASE_URL)
+
+# ============================================================
+# POOL INSTRUMENTATION
+# ============================================================
+
+class PoolStats:
+    """Counters for connection checkouts, shared by all threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.overflow_checkouts = 0
+            self.timeouts = 0
+            self.checkout_seconds_total = 0.0
+            self.checkout_seconds_max = 0.0
+
+    def record_checkout(self, seconds: float, overflow: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            if overflow:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+pool_counters = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            pool_counters.record_timeout()
+            raise
+        pool_counters.record_checkout(time.perf_counter() - start, overflow=self.overflow() > 0)
+        return conn
+
+
+# ============================================================
+# ENGINE / SESSIONS
+# ============================================================
+
+def _create_engine(profile: str):
+    return create_engine(DATABASE_URL, poolclass=InstrumentedQueuePool, **DB_POOL_PROFILES[profile])
+
+
+pool_profile = "api"
+engine = _create_engine(pool_profile)
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
 
+def configure_engine(profile: str):
+    """Rebuild the engine with another pool profile ("api" or "worker")."""
+    global engine, pool_profile
+    if profile == pool_profile:
+        return
+    engine.dispose()
+    pool_profile = profile
+    engine = _create_engine(profile)
+    SessionLocal.configure(bind=engine)
+    pool_counters.reset()
+
+
+def init_db():
+    """
+    Migrate the schema to the latest revision (`alembic upgrade head`).
+    
+    Kept off the import path so cold starts don't pay for it. Migrations live in
+    migrations/versions; databases built by the old create_all are picked up by
+    the idempotent baseline.
+    """
+    from alembic import command
+    from alembic.config import Config
+    command.upgrade(Config(str(PROJECT_ROOT / "alembic.ini")), "head")
+
+
+def pool_stats() -> dict:
+    """Current pool occupancy plus checkout counters since startup."""
+    pool = engine.pool
+    checkouts = pool_counters.checkouts
+    return {
+        "profile": pool_profile,
+        "pool_size": pool.size(),
+        "max_overflow": DB_POOL_PROFILES[pool_profile]["max_overflow"],
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": checkouts,
+        "overflow_checkouts": pool_counters.overflow_checkouts,
+        "timeouts": pool_counters.timeouts,
+        "checkout_ms_avg": round(pool_counters.checkout_seconds_total / checkouts * 1000, 3) if checkouts else 0.0,
+        "checkout_ms_max": round(pool_counters.checkout_seconds_max * 1000, 3),
+    }
+
+
 @contextmanager
 def get_db():
     """Context manager for database sessions."""
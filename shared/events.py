@@ -0,0 +1,20 @@
+"""Job status change notifications over Postgres LISTEN/NOTIFY.
+
+Writers add job_status_notify() to the RETURNING clause of the UPDATE that
+changes a job's status. Postgres sends the notification when that transaction
+commits, so listeners never see a status that was rolled back, and the write
+needs no extra round-trip. The API listens with api.notifier.
+"""
+from sqlalchemy import func, cast, Text
+
+JOB_STATUS_CHANNEL = "job_status"
+
+# Statuses after which a job never changes again
+TERMINAL_STATUSES = ("SUCCEEDED", "FAILED")
+
+
+def job_status_notify():
+    """RETURNING expression that NOTIFYs {"job_id", "status"} for each updated job."""
+    from .orm_models import IngestionJob
+    payload = func.json_build_object("job_id", IngestionJob.id, "status", IngestionJob.status)
+    return func.pg_notify(JOB_STATUS_CHANNEL, cast(payload, Text)).label("notified")
@@ -1,6 +1,7 @@
 """SQLAlchemy ORM Models."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON, Index, Boolean, true
+from sqlalchemy.dialects.postgresql import JSONB
 from .database import Base
 
 
@@ -16,7 +17,7 @@ class UtilityAccount(Base):
     __tablename__ = "utility_accounts"
 
     id = Column(Integer, primary_key=True)
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False, index=True)
     provider = Column(String, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -33,6 +34,14 @@ class IngestionJob(Base):
     updated_at = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # GET /jobs pages newest first on (created_at, id); each filter gets an index
+        # that already returns its rows in that order, so a page is one index range scan
+        Index("ix_ingestion_jobs_created", "created_at", "id"),
+        Index("ix_ingestion_jobs_status_created", "status", "created_at", "id"),
+        Index("ix_ingestion_jobs_account_created", "utility_account_id", "created_at", "id"),
+    )
+
 
 class Artifact(Base):
     __tablename__ = "artifacts"
@@ -42,6 +51,7 @@ class Artifact(Base):
     utility_account_id = Column(Integer, ForeignKey("utility_accounts.id"), nullable=False)
     gcs_path = Column(String, nullable=False)
     artifact_type = Column(String, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the stored bytes
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -49,10 +59,64 @@ class NormalizedBillSQL(Base):
     __tablename__ = "normalized_bills_sql"
 
     id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("ingestion_jobs.id"), nullable=True, unique=True, index=True)  # NULL for pre-0002 rows
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
     utility_account_id = Column(Integer, ForeignKey("utility_accounts.id"), nullable=False)
     billing_period_start = Column(String, nullable=False)  # Stored as string ISO date
     billing_period_end = Column(String, nullable=False)
     total_amount = Column(Float, nullable=False)
-    json_payload = Column(String, nullable=False)  # JSON stored as string or JSON type
+    json_payload = Column(JSONB, nullable=False)  # BillNormalized as a JSON object
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the source artifact
+    # False on a job's copy of a bill the account already has (the sink and the backfill skip it)
+    export_to_bigquery = Column(Boolean, nullable=False, default=True, server_default=true())
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Latest pre-0002 bill for an account: result fallback for jobs from before job_id existed
+        Index("ix_normalized_bills_sql_account_created", "utility_account_id", "created_at"),
+        # Containment queries on the payload, e.g. json_payload @> '{"line_items": [{"name": "Delivery"}]}'
+        Index("ix_normalized_bills_sql_payload", "json_payload", postgresql_using="gin",
+              postgresql_ops={"json_payload": "jsonb_path_ops"}),
+    )
+
+
+class LLMExtractionCache(Base):
+    __tablename__ = "llm_extraction_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 of prompt version, model, provider, bill text
+    provider = Column(String, nullable=True)
+    prompt_version = Column(String, nullable=False)
+    model_name = Column(String, nullable=False)
+    payload = Column(String, nullable=False)  # Extraction result as JSON string
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class BigQueryOutbox(Base):
+    __tablename__ = "bigquery_outbox"
+
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)  # Fully qualified project.dataset.table
+    row_id = Column(String, nullable=False)  # BigQuery insertId, so relayed rows dedup
+    payload = Column(String, nullable=False)  # Row as JSON string
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PublishOutbox(Base):
+    __tablename__ = "publish_outbox"
+
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, ForeignKey("ingestion_jobs.id"), nullable=False, index=True)
+    payload = Column(String, nullable=False)  # Pub/Sub message as JSON string
+    attempts = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)  # NULL until Pub/Sub accepted the message
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # The relay only ever scans unsent rows
+        Index("ix_publish_outbox_unsent", "next_attempt_at", postgresql_where=sent_at.is_(None)),
+    )
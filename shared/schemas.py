@@ -1,7 +1,9 @@
 """Pydantic schemas for API requests, responses, and data validation."""
 from typing import Optional, List
 from datetime import date
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from .config import AGENT_BATCH_MAX_ACCOUNTS, JOBS_LOOKUP_MAX_IDS
 
 
 # ============================================================
@@ -26,6 +28,16 @@ class IngestRunRequest(BaseModel):
     job_type: str
 
 
+class AgentRunBatchRequest(BaseModel):
+    """Request to start the agent for many utility accounts at once."""
+    utility_account_ids: List[int] = Field(..., min_length=1, max_length=AGENT_BATCH_MAX_ACCOUNTS)
+
+
+class JobLookupRequest(BaseModel):
+    """Fetch the status of many jobs by id."""
+    job_ids: List[int] = Field(..., min_length=1, max_length=JOBS_LOOKUP_MAX_IDS)
+
+
 # ============================================================
 # RESPONSE SCHEMAS
 # ============================================================
@@ -54,12 +66,48 @@ class JobResponse(BaseModel):
     message: Optional[str] = None
 
 
+class BatchJob(BaseModel):
+    job_id: int
+    utility_account_id: int
+
+
+class AgentRunBatchResponse(BaseModel):
+    """Response for bulk job creation, one job per distinct account."""
+    jobs: List[BatchJob]
+    status: str
+    message: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    """One row of a job listing."""
+    job_id: int
+    utility_account_id: int
+    job_type: str
+    status: Optional[str] = None
+    error_message: Optional[str] = None
+    attempt_count: Optional[int] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+class JobPage(BaseModel):
+    """A page of jobs, newest first. Pass next_cursor back as ?cursor= for the next page."""
+    jobs: List[JobStatus]
+    next_cursor: Optional[str] = None
+
+
+class JobLookupResponse(BaseModel):
+    """Jobs in request order; ids that don't exist are listed in `missing`."""
+    jobs: List[JobStatus]
+    missing: List[int] = []
+
+
 class BillResult(BaseModel):
     """Extracted bill data."""
     billing_period_start: str
     billing_period_end: str
     total_amount: float
-    json_payload: str
+    json_payload: dict  # The extracted BillNormalized, as an object
 
 
 class AgentResultResponse(BaseModel):
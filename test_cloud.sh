@@ -33,10 +33,7 @@ JOB_ID=$(echo $JOB_RES | python3 -c "import sys, json; print(json.load(sys.stdin
 echo ">>> Pipeline Started! Job ID: $JOB_ID"
 echo "--------------------------------"
 
-echo ">>> 4. Waiting 10 seconds for cloud processing..."
-sleep 10
-
-echo ">>> 5. Checking Result..."
-RESULT=$(curl -s -X GET "$BASE_URL/agent/result/$JOB_ID")
+echo ">>> 4. Waiting for the result (returns as soon as the job finishes, up to 60s)..."
+RESULT=$(curl -s -X GET "$BASE_URL/agent/result/$JOB_ID?wait=60")
 echo "Final Result:"
 echo $RESULT
@@ -0,0 +1,261 @@
+"""Asyncio worker - multiplexes many in-flight jobs on one event loop.
+
+Run with `python -m worker.aio`. The LLM call is natively async; SQL, GCS,
+BigQuery and connector calls have no async client in our stack, so they run
+on a bounded I/O thread pool via asyncio.to_thread.
+"""
+import json
+import time
+import signal
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from google.api_core import exceptions as gcp_exceptions
+from google.pubsub_v1.services.subscriber import SubscriberAsyncClient
+
+from shared.config import (
+    GCP_PROJECT, PUBSUB_SUBSCRIPTION,
+    WORKER_ASYNC_CONCURRENCY, WORKER_IO_THREADS, WORKER_ACK_DEADLINE,
+)
+from shared.database import configure_engine
+from shared.schemas import BillNormalized
+
+from .main import (
+    logger, JobContext, LeaseLost, start_stats_logger,
+    claim_job, resolve_unclaimed_job, update_job, complete_job,
+    fetch_bill, store_bill, process_ingest, parse_with_template, log_extraction_fallback,
+    reuse_parsed_bill, normalized_bill_record,
+)
+from .storage import download, content_hash
+from .llm import extract_bill_data_async
+from .bigquery import close_writer
+from .sinks import start_outbox_relay
+from .llm_cache import start_cache_purger
+
+# Max messages requested per pull RPC
+PULL_BATCH_SIZE = 100
+# Extend leases well before WORKER_ACK_DEADLINE runs out
+LEASE_EXTENSION_INTERVAL = WORKER_ACK_DEADLINE / 3
+
+
+# ============================================================
+# JOB PROCESSORS
+# ============================================================
+
+async def extract_bill_async(bill_text: str, provider: str) -> BillNormalized:
+    """Template fast path, else async LLM extraction with Pydantic validation."""
+    validated = parse_with_template(bill_text, provider)
+    if validated is None:
+        try:
+            extracted = await extract_bill_data_async(bill_text, provider=provider)
+            validated = BillNormalized(**extracted)
+            logger.info(f"Extracted: total=${validated.total_amount}, items={len(validated.line_items)}")
+
+        except Exception as llm_error:
+            log_extraction_fallback(bill_text, llm_error)
+            raise
+
+    return validated
+
+
+async def process_parse_async(job_id: int, customer_id: int, utility_account_id: int, gcs_path: str, provider: str) -> list:
+    """Parse a stored bill. Returns the NormalizedBillSQL rows to save."""
+    bill_bytes = await asyncio.to_thread(download, gcs_path)
+    bill_text = bill_bytes.decode("utf-8")
+    logger.info(f"Downloaded bill ({len(bill_text)} chars)")
+
+    digest = content_hash(bill_bytes)
+    validated, same_account = await asyncio.to_thread(reuse_parsed_bill, digest, utility_account_id)
+    if same_account:
+        logger.info("Identical bill already parsed for this account, linking a copy to this job")
+    elif validated is not None:
+        logger.info("Reusing parse of an identical bill")
+    else:
+        validated = await extract_bill_async(bill_text, provider)
+
+    return [normalized_bill_record(job_id, customer_id, utility_account_id, validated, digest,
+                                   export_to_bigquery=not same_account)]
+
+
+async def process_full_pipeline_async(job_id: int, utility_account_id: int, customer_id: int, provider: str) -> list:
+    """Full pipeline: parse the fetched bytes in memory while the upload runs."""
+    content = await asyncio.to_thread(fetch_bill, utility_account_id, provider)
+    digest = content_hash(content)
+    upload = asyncio.create_task(asyncio.to_thread(store_bill, job_id, utility_account_id, content, digest))
+    # Mark the upload's exception as retrieved in case parsing fails first and we never await it
+    upload.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    validated, same_account = await asyncio.to_thread(reuse_parsed_bill, digest, utility_account_id)
+    if same_account:
+        logger.info("Identical bill already parsed for this account, linking a copy to this job")
+    elif validated is not None:
+        logger.info("Reusing parse of an identical bill")
+    else:
+        validated = await extract_bill_async(content.decode("utf-8"), provider)
+    artifact = await upload
+
+    return [artifact, normalized_bill_record(job_id, customer_id, utility_account_id, validated, digest,
+                                             export_to_bigquery=not same_account)]
+
+
+# ============================================================
+# MESSAGE HANDLER
+# ============================================================
+
+async def handle_message_async(data: bytes) -> int:
+    """Process one message payload. Returns None to ack, else the ack deadline to set (0 = nack)."""
+    start = time.time()
+    job_id = None
+    claim = None
+
+    try:
+        data = json.loads(data.decode("utf-8"))
+        job_id = data.get("job_id")
+        job_type = data.get("job_type")
+        utility_account_id = data.get("utility_account_id")
+
+        # Each task runs in its own context copy, so this never leaks across jobs
+        JobContext.set(job_id)
+        logger.info(f"Received: type={job_type}")
+
+        claim = await asyncio.to_thread(claim_job, job_id)
+        if not claim:
+            return await asyncio.to_thread(resolve_unclaimed_job, job_id)
+
+        customer_id = data.get("customer_id") or claim["customer_id"]
+        provider = claim["provider"]
+        logger.info(f"RUNNING (attempt {claim['attempt_count']})")
+
+        records = []
+        if job_type == "INGEST_BILL":
+            records.append(await asyncio.to_thread(process_ingest, job_id, utility_account_id, provider))
+        elif job_type == "PARSE_BILL":
+            gcs_path = data.get("artifact_path")
+            records.extend(await process_parse_async(job_id, customer_id, utility_account_id, gcs_path, provider))
+        elif job_type == "FULL_PIPELINE":
+            records.extend(await process_full_pipeline_async(job_id, utility_account_id, customer_id, provider))
+
+        await asyncio.to_thread(complete_job, job_id, records, claim["attempt_count"])
+        duration = int((time.time() - start) * 1000)
+        logger.info(f"SUCCEEDED ({duration}ms)")
+        return None
+
+    except LeaseLost as e:
+        logger.warning(f"Lease lost, discarding results: {e}")
+        return None
+    except Exception as e:
+        duration = int((time.time() - start) * 1000)
+        error = str(e)[:500]
+        logger.error(f"FAILED: {error} ({duration}ms)")
+
+        if claim:
+            await asyncio.to_thread(update_job, job_id, "FAILED", error, claim["attempt_count"])
+        return 0
+
+
+# ============================================================
+# PULL LOOP
+# ============================================================
+
+class AsyncWorker:
+    """Pulls messages and runs up to `concurrency` jobs concurrently."""
+
+    def __init__(self, concurrency: int = WORKER_ASYNC_CONCURRENCY):
+        self.concurrency = concurrency
+        self.client = SubscriberAsyncClient()
+        self.path = SubscriberAsyncClient.subscription_path(GCP_PROJECT, PUBSUB_SUBSCRIPTION)
+        self.in_flight = {}  # ack_id -> task
+        self.stopping = asyncio.Event()
+
+    async def run(self):
+        logger.info(
+            f"Starting async worker (subscription: {PUBSUB_SUBSCRIPTION}, concurrency={self.concurrency})"
+        )
+        lease_task = asyncio.create_task(self._extend_leases())
+
+        while not self.stopping.is_set():
+            capacity = self.concurrency - len(self.in_flight)
+            if capacity <= 0:
+                await asyncio.wait(set(self.in_flight.values()), return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            try:
+                response = await self.client.pull(
+                    subscription=self.path,
+                    max_messages=min(capacity, PULL_BATCH_SIZE),
+                    timeout=30,
+                )
+            except (gcp_exceptions.DeadlineExceeded, gcp_exceptions.ServiceUnavailable):
+                continue
+
+            for received in response.received_messages:
+                task = asyncio.create_task(self._run_job(received.ack_id, received.message.data))
+                self.in_flight[received.ack_id] = task
+
+        logger.info(f"Shutting down, draining {len(self.in_flight)} in-flight messages...")
+        if self.in_flight:
+            await asyncio.wait(set(self.in_flight.values()))
+        lease_task.cancel()
+        await asyncio.to_thread(close_writer)
+        logger.info("Worker stopped")
+
+    async def _run_job(self, ack_id: str, data: bytes):
+        try:
+            deadline = await handle_message_async(data)
+            if deadline is None:
+                await self.client.acknowledge(subscription=self.path, ack_ids=[ack_id])
+            else:
+                # 0 nacks; longer postpones redelivery of a job another worker is running
+                await self.client.modify_ack_deadline(
+                    subscription=self.path, ack_ids=[ack_id], ack_deadline_seconds=deadline
+                )
+        except Exception as e:
+            # Lease will expire and Pub/Sub redelivers
+            logger.error(f"Failed to ack/nack message: {e}")
+        finally:
+            self.in_flight.pop(ack_id, None)
+
+    async def _extend_leases(self):
+        """Keep leases alive for jobs that outlast the subscription ack deadline."""
+        while True:
+            await asyncio.sleep(LEASE_EXTENSION_INTERVAL)
+            ack_ids = list(self.in_flight)
+            # modify_ack_deadline accepts at most 2500 ack_ids per call
+            for i in range(0, len(ack_ids), 2500):
+                try:
+                    await self.client.modify_ack_deadline(
+                        subscription=self.path,
+                        ack_ids=ack_ids[i:i + 2500],
+                        ack_deadline_seconds=WORKER_ACK_DEADLINE,
+                    )
+                except Exception as e:
+                    logger.warning(f"Lease extension failed: {e}")
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+async def run():
+    configure_engine("worker_aio")
+    start_stats_logger()
+    start_outbox_relay()
+    start_cache_purger()
+
+    loop = asyncio.get_running_loop()
+    # Bounded pool for blocking SQL/GCS/BigQuery calls made through asyncio.to_thread
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=WORKER_IO_THREADS, thread_name_prefix="io"))
+
+    worker = AsyncWorker()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stopping.set)
+    await worker.run()
+
+
+def main():
+    """Start the asyncio worker."""
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
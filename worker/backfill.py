@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+"""Backfill BigQuery normalized_bills from Cloud SQL with load jobs.
+
+Run with `python -m worker.backfill`. Rows are read from normalized_bills_sql in
+id order with a server-side cursor and written to gzipped NDJSON shards, skipping
+job copies marked export_to_bigquery = false (as the streaming sink does). Each
+shard is staged in artifact storage and loaded with a BigQuery load job. Load
+jobs are free, unlike streaming inserts. Progress is saved to a state file after
+every step, so an interrupted run resumes where it stopped. Re-running a shard
+never loads it twice, because load job ids are deterministic per run and shard.
+"""
+import os
+import json
+import gzip
+import time
+import uuid
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+
+from google.api_core import exceptions as gcp_exceptions
+from sqlalchemy import cast, Text
+
+from shared.config import BQ_BACKFILL_SHARD_ROWS, BQ_BACKFILL_FETCH_SIZE, BQ_BACKFILL_MAX_PENDING_LOADS
+from shared.database import get_db
+
+from .bigquery import get_client, table_id, normalized_bill_row, TABLE
+from .storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+STAGING_PREFIX = "staging/backfill"
+
+
+# ============================================================
+# STATE
+# ============================================================
+
+class BackfillState:
+    """Resumable progress, persisted as JSON after every change."""
+
+    def __init__(self, path: str, data: dict):
+        self.path = path
+        self.data = data
+
+    @classmethod
+    def load_or_create(cls, path: str, table: str, replace: bool) -> "BackfillState":
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data["table"] != table:
+                raise ValueError(f"State file {path} belongs to table {data['table']}, not {table}")
+            logger.info(f"Resuming run {data['run_id']} after id {data['last_id']}")
+            return cls(path, data)
+
+        data = {
+            "run_id": datetime.utcnow().strftime("%Y%m%d%H%M%S") + "_" + uuid.uuid4().hex[:8],
+            "table": table,
+            "replace": replace,
+            "truncated": False,
+            "last_id": 0,         # highest id written to a shard
+            "export_done": False,
+            "shards": [],         # {"index", "first_id", "last_id", "rows", "uri", "job_id", "state": staged|loaded}
+        }
+        state = cls(path, data)
+        state.save()
+        return state
+
+    def save(self):
+        """Write atomically so a crash never leaves a torn state file."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def shards_in(self, *states: str) -> list:
+        return [shard for shard in self.data["shards"] if shard["state"] in states]
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+
+def export_shard(after_id: int, shard_rows: int, fetch_size: int, path: str, until_id: int = None) -> tuple:
+    """
+    Write up to `shard_rows` rows with after_id < id [<= until_id] to a gzipped NDJSON file.
+
+    Returns (rows, first_id, last_id); rows == 0 means the table is exhausted.
+    """
+    from shared.orm_models import NormalizedBillSQL
+
+    rows, first_id, last_id = 0, None, after_id
+    with get_db() as db, gzip.open(path, "wt", encoding="utf-8") as out:
+        # yield_per streams over a server-side cursor instead of buffering the result
+        query = db.query(
+            NormalizedBillSQL.id,
+            NormalizedBillSQL.customer_id,
+            NormalizedBillSQL.utility_account_id,
+            NormalizedBillSQL.billing_period_start,
+            NormalizedBillSQL.billing_period_end,
+            NormalizedBillSQL.total_amount,
+            # As text: goes straight into the NDJSON line, no decode/re-encode in Python
+            cast(NormalizedBillSQL.json_payload, Text).label("json_payload"),
+            NormalizedBillSQL.created_at,
+        ).filter(
+            NormalizedBillSQL.id > after_id,
+            # A job's copy of a bill its account already has: the streaming sink skips it too
+            NormalizedBillSQL.export_to_bigquery.is_(True),
+        )
+        if until_id is not None:
+            query = query.filter(NormalizedBillSQL.id <= until_id)
+        query = query.order_by(NormalizedBillSQL.id).limit(shard_rows).yield_per(fetch_size)
+
+        for row in query:
+            record = normalized_bill_row(
+                row.customer_id, row.utility_account_id, row.billing_period_start,
+                row.billing_period_end, row.total_amount, row.json_payload, row.created_at,
+            )
+            out.write(json.dumps(record) + "\n")
+            rows += 1
+            first_id = first_id or row.id
+            last_id = row.id
+    return rows, first_id, last_id
+
+
+# ============================================================
+# LOAD
+# ============================================================
+
+def load_job_config():
+    from google.cloud import bigquery
+    return bigquery.LoadJobConfig(
+        source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+    )
+
+
+def truncate_table(table: str):
+    logger.info(f"Truncating {table}")
+    get_client().query(f"TRUNCATE TABLE `{table}`").result()
+
+
+def start_load(table: str, shard: dict):
+    """Submit a shard's load job, or pick up the one an earlier attempt submitted."""
+    client = get_client()
+    try:
+        if shard["uri"].startswith("gs://"):
+            return client.load_table_from_uri(
+                shard["uri"], table, job_id=shard["job_id"], job_config=load_job_config()
+            )
+        # Local storage backend: upload the staged file with the load request
+        with open(shard["uri"][len("file://"):], "rb") as f:
+            return client.load_table_from_file(
+                f, table, job_id=shard["job_id"], job_config=load_job_config()
+            )
+    except gcp_exceptions.Conflict:
+        # Same job id already exists: the load was submitted before we crashed
+        return client.get_job(shard["job_id"])
+
+
+def stage_shard(local_path: str, shard: dict, run_id: str) -> str:
+    """Move a shard into artifact storage; BigQuery loads gs:// shards straight from GCS."""
+    path = f"{STAGING_PREFIX}/{run_id}/shard-{shard['index']:05d}.ndjson.gz"
+    with open(local_path, "rb") as f:
+        # application/gzip: stored as-is, never gzipped a second time
+        uri = get_storage().upload_stream(f, path, content_type="application/gzip")
+    os.unlink(local_path)
+    return uri
+
+
+def shard_is_staged(shard: dict) -> bool:
+    return shard["uri"].startswith("gs://") or os.path.exists(shard["uri"][len("file://"):])
+
+
+def wait_for_load(state: BackfillState, shard: dict, job):
+    try:
+        job.result()
+    except Exception:
+        # Next attempt (on resume) needs a fresh job id; a failed job id can't be reused
+        shard["attempts"] = shard.get("attempts", 0) + 1
+        shard["job_id"] = f"{shard['job_id'].split('-')[0]}-{shard['attempts']}"
+        state.save()
+        raise
+    shard["state"] = "loaded"
+    state.save()
+    logger.info(f"Loaded shard {shard['index']} ({shard['rows']} rows, ids {shard['first_id']}-{shard['last_id']})")
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def run_backfill(state: BackfillState, table: str, shard_rows: int, fetch_size: int, max_pending: int, work_dir: str):
+    data = state.data
+    if data["replace"] and not data["truncated"]:
+        truncate_table(table)
+        data["truncated"] = True
+        state.save()
+
+    def shard_file(index: int) -> str:
+        return os.path.join(work_dir, f"{data['run_id']}-shard-{index:05d}.ndjson.gz")
+
+    pending = []  # (shard, job) loads in flight
+
+    def submit(shard: dict):
+        pending.append((shard, start_load(table, shard)))
+        while len(pending) > max_pending:
+            wait_for_load(state, *pending.pop(0))
+
+    # Shards staged by an interrupted run: their load job may or may not exist yet
+    for shard in state.shards_in("staged"):
+        if not shard_is_staged(shard):
+            # Local staged file is gone; re-export exactly that id range
+            local_path = shard_file(shard["index"])
+            export_shard(shard["first_id"] - 1, shard["rows"], fetch_size, local_path, until_id=shard["last_id"])
+            shard["uri"] = stage_shard(local_path, shard, data["run_id"])
+            state.save()
+        submit(shard)
+
+    while not data["export_done"]:
+        index = len(data["shards"])
+        local_path = shard_file(index)
+        started = time.time()
+        rows, first_id, last_id = export_shard(data["last_id"], shard_rows, fetch_size, local_path)
+        if rows == 0:
+            os.unlink(local_path)
+            data["export_done"] = True
+            state.save()
+            break
+
+        shard = {
+            "index": index, "first_id": first_id, "last_id": last_id, "rows": rows,
+            "job_id": f"backfill_{data['run_id']}_{index:05d}", "state": "staged",
+        }
+        # Recorded only once staged: a crash before this re-exports the shard from last_id
+        shard["uri"] = stage_shard(local_path, shard, data["run_id"])
+        data["shards"].append(shard)
+        data["last_id"] = last_id
+        state.save()
+        logger.info(f"Exported shard {index}: {rows} rows in {time.time() - started:.1f}s → {shard['uri']}")
+
+        submit(shard)
+
+    for shard, job in pending:
+        wait_for_load(state, shard, job)
+
+    total = sum(shard["rows"] for shard in state.shards_in("loaded"))
+    logger.info(f"Backfill {data['run_id']} complete: {total} rows in {len(data['shards'])} shards")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--table", default=table_id(TABLE), help="Destination table (project.dataset.table)")
+    parser.add_argument("--replace", action="store_true", help="Truncate the table before loading")
+    parser.add_argument("--shard-rows", type=int, default=BQ_BACKFILL_SHARD_ROWS, help="Rows per NDJSON shard / load job")
+    parser.add_argument("--fetch-size", type=int, default=BQ_BACKFILL_FETCH_SIZE, help="Rows per cursor fetch")
+    parser.add_argument("--max-pending-loads", type=int, default=BQ_BACKFILL_MAX_PENDING_LOADS,
+                        help="Load jobs to keep running while the next shards export")
+    parser.add_argument("--state-file", default=".backfill/normalized_bills.json",
+                        help="Progress file; rerun with the same file to resume")
+    parser.add_argument("--work-dir", default=None, help="Directory for shard files (default: system temp)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    state = BackfillState.load_or_create(args.state_file, args.table, args.replace)
+    work_dir = args.work_dir or os.path.join(tempfile.gettempdir(), "minimeter-backfill")
+    os.makedirs(work_dir, exist_ok=True)
+
+    started = time.time()
+    total = run_backfill(state, args.table, args.shard_rows, args.fetch_size, args.max_pending_loads, work_dir)
+    logger.info(f"Done in {time.time() - started:.1f}s ({total} rows)")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
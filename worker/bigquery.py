@@ -1,34 +1,449 @@
-"""BigQuery helper for writing normalized bills."""
+"""BigQuery helper for writing normalized bills.
+
+Rows go through a process-wide BigQueryBatchWriter: jobs enqueue a row and a
+background thread streams them in batches, flushing by row count, byte size or
+age. Each row is fsynced to a local spool segment under BQ_SPOOL_DIR (on by
+default) before write() returns, and segments left behind by a crash are
+replayed on startup.
+
+Processes sharing BQ_SPOOL_DIR (the supervisor's children) each spool into
+their own subdirectory and hold a flock on it for their lifetime. A starting
+writer only replays subdirectories whose lock it can take, i.e. whose owner
+has exited, so it never touches a live sibling's segments.
+"""
+import os
+import json
+import fcntl
+import time
+import uuid
+import random
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from google.cloud import bigquery
-from shared.config import GCP_PROJECT, BQ_DATASET
+from typing import List, Optional
+
+from shared.config import (
+    GCP_PROJECT, BQ_DATASET,
+    BQ_BATCH_ENABLED, BQ_BATCH_WAIT, BQ_BATCH_MAX_ROWS, BQ_BATCH_MAX_BYTES,
+    BQ_BATCH_MAX_LATENCY_MS, BQ_BATCH_MAX_RETRIES, BQ_SPOOL_DIR,
+)
+
+logger = logging.getLogger(__name__)
 
-client = bigquery.Client(project=GCP_PROJECT)
 TABLE = "normalized_bills"
 
+_client = None
+_client_lock = threading.Lock()
 
-def insert_normalized_bill(
-    customer_id: int,
-    utility_account_id: int,
-    billing_period_start: str,
-    billing_period_end: str,
-    total_amount: float,
-    json_payload: str,
-):
-    """Insert a normalized bill record into BigQuery."""
-    table_id = f"{GCP_PROJECT}.{BQ_DATASET}.{TABLE}"
-    
-    rows = [{
+
+def get_client():
+    """BigQuery client, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from google.cloud import bigquery
+            _client = bigquery.Client(project=GCP_PROJECT)
+        return _client
+
+
+def table_id(table: str = TABLE) -> str:
+    return f"{GCP_PROJECT}.{BQ_DATASET}.{table}"
+
+
+class BigQueryInsertError(Exception):
+    """A row was rejected by BigQuery, or still failing after all retries."""
+
+
+# ============================================================
+# BATCH WRITER
+# ============================================================
+
+class PendingRow:
+    __slots__ = ("row_id", "payload", "size", "future")
+
+    def __init__(self, row_id: str, payload: str):
+        self.row_id = row_id
+        self.payload = payload
+        self.size = len(payload)
+        self.future = Future()
+
+
+class BigQueryBatchWriter:
+    """Buffers rows across jobs and streams them to one table in batches."""
+
+    def __init__(self, table: str = None, max_rows: int = BQ_BATCH_MAX_ROWS, max_bytes: int = BQ_BATCH_MAX_BYTES,
+                 max_latency_ms: int = BQ_BATCH_MAX_LATENCY_MS, max_retries: int = BQ_BATCH_MAX_RETRIES,
+                 spool_dir: str = BQ_SPOOL_DIR):
+        self.table = table or table_id()
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency_ms / 1000
+        self.max_retries = max_retries
+        self.spool_dir = spool_dir or None
+
+        self._pending: List[PendingRow] = []
+        self._pending_bytes = 0
+        self._oldest = 0.0  # monotonic enqueue time of the first pending row
+        self._flushing = 0  # rows taken by the flush thread but not yet resolved
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+        # Spool: a new segment starts whenever the queue drains; deleted once its rows are written
+        self._spool_path = None  # this process's subdirectory of spool_dir
+        self._spool_lock = None  # held open (and flocked) until the process exits
+        self._segment = None
+        self._segment_path = None
+        self._segment_seq = 0
+
+        self.rows_enqueued = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.batches = 0
+        self.retries = 0
+
+    def start(self):
+        if self.spool_dir:
+            self._claim_spool()
+            self._replay_spool()
+        elif BQ_BATCH_WAIT == "enqueue":
+            logger.warning(
+                "BigQuery writer has no spool (BQ_SPOOL_DIR is empty) but BQ_BATCH_WAIT=enqueue: "
+                "queued rows of finished jobs are lost if this process dies before they flush"
+            )
+        self._thread = threading.Thread(target=self._run, name="bq-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, row: dict, row_id: str = None) -> Future:
+        """
+        Enqueue a row. The returned Future resolves once the row is in BigQuery
+        (or raises BigQueryInsertError); the row is safe to forget about as soon
+        as write() returns.
+        """
+        pending = PendingRow(row_id or uuid.uuid4().hex, json.dumps(row))
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("BigQuery writer is closed")
+            if self.spool_dir:
+                self._spool(pending)
+            first = not self._pending
+            if first:
+                self._oldest = time.monotonic()
+            self._pending.append(pending)
+            self._pending_bytes += pending.size
+            self.rows_enqueued += 1
+            # Wake the flush thread to arm its latency timer, or to flush a full batch
+            if first or len(self._pending) >= self.max_rows or self._pending_bytes >= self.max_bytes:
+                self._cond.notify_all()
+        return pending.future
+
+    def flush(self, timeout: float = None) -> bool:
+        """Flush everything enqueued so far. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._oldest = 0.0  # make pending rows due now
+            self._cond.notify_all()
+            while self._pending or self._flushing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 30.0):
+        """Flush pending rows and stop the flush thread."""
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        if not flushed:
+            logger.error(f"BigQuery writer closed with {len(self._pending)} rows unflushed")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "enqueued": self.rows_enqueued,
+                "written": self.rows_written,
+                "failed": self.rows_failed,
+                "batches": self.batches,
+                "retries": self.retries,
+            }
+
+    # --- flush thread ---
+
+    def _due(self) -> bool:
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.max_rows
+                or self._pending_bytes >= self.max_bytes
+                or time.monotonic() - self._oldest >= self.max_latency)
+
+    def _take_batch(self):
+        """Pop up to max_rows / max_bytes from the front of the queue."""
+        batch, size = [], 0
+        while self._pending and len(batch) < self.max_rows:
+            if batch and size + self._pending[0].size > self.max_bytes:
+                break
+            row = self._pending.pop(0)
+            batch.append(row)
+            size += row.size
+        self._pending_bytes -= size
+        if not self._pending:
+            self._oldest = 0.0
+        self._flushing += len(batch)
+
+        # Rows still pending stay in the current segment; only a fully drained segment can be deleted
+        segment_path = None
+        if self._segment is not None and not self._pending:
+            self._segment.close()
+            segment_path, self._segment, self._segment_path = self._segment_path, None, None
+        return batch, segment_path
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due() and not self._closed:
+                    timeout = self.max_latency - (time.monotonic() - self._oldest) if self._pending else None
+                    self._cond.wait(timeout)
+                if self._closed and not self._pending:
+                    return
+                batch, segment_path = self._take_batch()
+
+            failed = batch
+            try:
+                failed = self._insert_with_retries(batch)
+                if self.spool_dir and failed:
+                    self._spool_failed(failed)
+                if segment_path:
+                    _unlink_if_exists(segment_path)
+            except Exception as e:
+                # Never let the flush thread die: flush() and later rows depend on it
+                logger.error(f"BigQuery writer failed to finish a batch of {len(batch)} rows: {e}")
+                for row in batch:
+                    if not row.future.done():
+                        row.future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._flushing -= len(batch)
+                    self.batches += 1
+                    self.rows_written += len(batch) - len(failed)
+                    self.rows_failed += len(failed)
+                    self._cond.notify_all()
+
+    def _insert_with_retries(self, batch: List[PendingRow]) -> List[PendingRow]:
+        """Insert a batch, retrying only the rows that failed. Returns rows that never made it."""
+        remaining = batch
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                with self._cond:
+                    self.retries += 1
+                time.sleep(min(30.0, 2 ** attempt) * (0.5 + random.random() / 2))
+            try:
+                # row_ids become insertIds, so BigQuery dedups rows resent after a partial failure
+                errors = get_client().insert_rows_json(
+                    self.table,
+                    [json.loads(row.payload) for row in remaining],
+                    row_ids=[row.row_id for row in remaining],
+                )
+            except Exception as e:
+                error = e
+                logger.warning(f"BigQuery insert of {len(remaining)} rows failed (attempt {attempt + 1}): {e}")
+                continue
+
+            failed_indexes = {entry["index"] for entry in errors}
+            for i, row in enumerate(remaining):
+                if i not in failed_indexes:
+                    row.future.set_result(True)
+            if not errors:
+                return []
+            error = errors
+            remaining = [remaining[i] for i in sorted(failed_indexes)]
+            logger.warning(f"BigQuery rejected {len(remaining)} rows (attempt {attempt + 1}): {errors[:3]}")
+
+        for row in remaining:
+            row.future.set_exception(BigQueryInsertError(f"BigQuery insert failed for row {row.row_id}: {error}"))
+        logger.error(f"Giving up on {len(remaining)} BigQuery rows after {self.max_retries} retries")
+        return remaining
+
+    # --- spool ---
+
+    def _spool(self, pending: PendingRow):
+        """Append a row to the current segment and fsync it (caller holds the lock)."""
+        if self._segment is None:
+            self._segment_seq += 1
+            name = f"segment-{os.getpid()}-{int(time.time() * 1000)}-{self._segment_seq}.ndjson"
+            self._segment_path = os.path.join(self._spool_path, name)
+            self._segment = open(self._segment_path, "a", encoding="utf-8")
+        self._segment.write(json.dumps({"row_id": pending.row_id, "row": pending.payload}) + "\n")
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+
+    def _spool_failed(self, failed: List[PendingRow]):
+        """Keep rows that exhausted their retries; *.failed files are not replayed automatically."""
+        path = os.path.join(self._spool_path, f"failed-{os.getpid()}-{int(time.time() * 1000)}.ndjson.failed")
+        with open(path, "w", encoding="utf-8") as f:
+            for row in failed:
+                f.write(json.dumps({"row_id": row.row_id, "row": row.payload}) + "\n")
+
+    def _claim_spool(self):
+        """Create this process's spool subdirectory and lock it for as long as the process lives."""
+        self._spool_path = os.path.join(self.spool_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        os.makedirs(self._spool_path, exist_ok=True)
+        self._spool_lock = open(os.path.join(self._spool_path, ".lock"), "w")
+        fcntl.flock(self._spool_lock, fcntl.LOCK_EX)
+
+    def _replay_spool(self):
+        """Re-enqueue rows from segments that exited processes never finished."""
+        # One replayer at a time, so two starting siblings don't both take a dead directory
+        with open(os.path.join(self.spool_dir, ".replay.lock"), "w") as replay_lock:
+            fcntl.flock(replay_lock, fcntl.LOCK_EX)
+            # Segments spooled straight into spool_dir by writers from before per-process directories
+            self._replay_segments(self.spool_dir)
+            for name in sorted(os.listdir(self.spool_dir)):
+                path = os.path.join(self.spool_dir, name)
+                if path == self._spool_path or not os.path.isdir(path):
+                    continue
+                with open(os.path.join(path, ".lock"), "w") as owner_lock:
+                    try:
+                        fcntl.flock(owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # owner is alive
+                    self._replay_segments(path)
+                    _unlink_if_exists(os.path.join(path, ".lock"))
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    pass  # *.failed files are kept for inspection
+
+    def _replay_segments(self, directory: str):
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".ndjson"):
+                continue
+            path = os.path.join(directory, name)
+            with open(path, encoding="utf-8") as f:
+                # A torn last line (crash mid-write) is skipped; that row's job was never acked
+                entries = []
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+            # Re-spooled into this process's own directory before the old segment goes
+            for entry in entries:
+                self.write(json.loads(entry["row"]), entry["row_id"])
+            _unlink_if_exists(path)
+            logger.info(f"Replayed {len(entries)} spooled BigQuery rows from {name}")
+
+
+def _unlink_if_exists(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_writer: Optional[BigQueryBatchWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> BigQueryBatchWriter:
+    """Process-wide batch writer, started on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BigQueryBatchWriter().start()
+        return _writer
+
+
+def close_writer(timeout: float = 30.0):
+    """Flush and stop the batch writer, if one was started. Call on shutdown."""
+    with _writer_lock:
+        writer = _writer
+    if writer is not None:
+        writer.close(timeout)
+
+
+def writer_stats() -> Optional[dict]:
+    return _writer.stats() if _writer is not None else None
+
+
+# ============================================================
+# NORMALIZED BILLS
+# ============================================================
+
+def normalized_bill_row(customer_id: int, utility_account_id: int, billing_period_start: str,
+                        billing_period_end: str, total_amount: float, json_payload,
+                        created_at: datetime = None) -> dict:
+    """
+    A `normalized_bills` row, as streamed by the writer and loaded by the backfill.
+
+    `json_payload` is the bill as a dict (the Cloud SQL JSONB value) or as JSON
+    text; BigQuery's column is a STRING either way.
+    """
+    if not isinstance(json_payload, str):
+        json_payload = json.dumps(json_payload, separators=(",", ":"))
+    return {
         "customer_id": customer_id,
         "utility_account_id": utility_account_id,
         "bill_period_start": billing_period_start,
         "bill_period_end": billing_period_end,
         "total_amount": total_amount,
         "json_payload": json_payload,
-        "created_at": datetime.utcnow().isoformat(),
-    }]
-    
-    errors = client.insert_rows_json(table_id, rows)
+        "created_at": (created_at or datetime.utcnow()).isoformat(),
+    }
+
+
+def insert_rows(rows: List[dict], row_ids: List[str], table: str = None):
+    """One synchronous streaming insert; raises BigQueryInsertError if any row is rejected."""
+    errors = get_client().insert_rows_json(table or table_id(), rows, row_ids=row_ids)
     if errors:
-        raise Exception(f"BigQuery insert errors: {errors}")
+        raise BigQueryInsertError(f"BigQuery insert errors: {errors}")
+
+
+_direct_executor = None
+_direct_executor_lock = threading.Lock()
+
+
+def write_row(row: dict, row_id: str = None) -> Future:
+    """
+    Start writing a row without blocking. The Future resolves once it is in
+    BigQuery: through the batch writer, or a direct insert if batching is off.
+    """
+    global _direct_executor
+    if BQ_BATCH_ENABLED:
+        return get_writer().write(row, row_id)
+    with _direct_executor_lock:
+        if _direct_executor is None:
+            _direct_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bq-insert")
+    return _direct_executor.submit(insert_rows, [row], [row_id or uuid.uuid4().hex])
+
+
+def insert_normalized_bill(
+    customer_id: int,
+    utility_account_id: int,
+    billing_period_start: str,
+    billing_period_end: str,
+    total_amount: float,
+    json_payload,
+    row_id: str = None,
+):
+    """
+    Insert a normalized bill record into BigQuery.
+
+    Batched unless BQ_BATCH_ENABLED is off. With BQ_BATCH_WAIT=flush (or with
+    batching off) the call blocks until the row is written; with `enqueue` it
+    returns at once.
+    """
+    row = normalized_bill_row(
+        customer_id, utility_account_id, billing_period_start, billing_period_end, total_amount, json_payload
+    )
+    future = write_row(row, row_id)
+    if BQ_BATCH_WAIT == "flush" or not BQ_BATCH_ENABLED:
+        future.result()
     return True
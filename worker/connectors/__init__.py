@@ -1,6 +1,10 @@
 from .base import BaseConnector
 from .mock_utility_a import MockUtilityAConnector
 from .mock_utility_b import MockUtilityBConnector
-from .registry import get_connector, CONNECTOR_REGISTRY
+from .registry import get_connector, get_template, extract_with_template, CONNECTOR_REGISTRY
+from .templates import RegexBillTemplate
 
-__all__ = ["BaseConnector", "MockUtilityAConnector", "MockUtilityBConnector", "get_connector", "CONNECTOR_REGISTRY"]
+__all__ = [
+    "BaseConnector", "MockUtilityAConnector", "MockUtilityBConnector", "RegexBillTemplate",
+    "get_connector", "get_template", "extract_with_template", "CONNECTOR_REGISTRY",
+]
@@ -1,10 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import Tuple
+from typing import Optional, Tuple
+
+from .templates import RegexBillTemplate
 
 
 class BaseConnector(ABC):
     """Base interface for utility data connectors."""
 
+    # Parser for this connector's fixed bill layout; None means LLM only
+    bill_template: Optional[RegexBillTemplate] = None
+
     @abstractmethod
     def fetch_bill_artifact(self, utility_account_id: int) -> Tuple[bytes, str]:
         """
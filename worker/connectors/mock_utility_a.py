@@ -1,5 +1,6 @@
 from typing import Tuple
 from .base import BaseConnector
+from .templates import RegexBillTemplate, AMOUNT, parse_month_day_year
 
 
 SAMPLE_BILL = """
@@ -37,9 +38,32 @@ Thank you for being our customer!
 """
 
 
+def _parse_period_a(match):
+    """'Dec 1 - Dec 31, 2025' (start year optional, may roll over into the end year)."""
+    start_month, start_day, start_year, end_month, end_day, end_year = match.groups()
+    end = parse_month_day_year(end_month, end_day, end_year)
+    start = parse_month_day_year(start_month, start_day, start_year or end_year)
+    if start > end and not start_year:
+        start = start.replace(year=start.year - 1)
+    return start, end
+
+
+TEMPLATE_A = RegexBillTemplate(
+    name="utility_a",
+    period_pattern=r"^Billing Period:\s*([A-Za-z]+)\s+(\d{1,2})(?:,\s*(\d{4}))?\s*-\s*([A-Za-z]+)\s+(\d{1,2}),\s*(\d{4})\s*$",
+    parse_period=_parse_period_a,
+    section_start=r"^CHARGES",
+    section_end=r"TOTAL DUE",
+    line_item_pattern=r"^\s*([A-Za-z][^:\n]*?):\s+" + AMOUNT + r"\s*$",
+    total_pattern=r"^TOTAL DUE:\s*" + AMOUNT,
+)
+
+
 class MockUtilityAConnector(BaseConnector):
     """Mock connector for testing. Returns a sample bill."""
 
+    bill_template = TEMPLATE_A
+
     def fetch_bill_artifact(self, utility_account_id: int) -> Tuple[bytes, str]:
         """Return a mock bill as text."""
         content = SAMPLE_BILL.strip().encode("utf-8")
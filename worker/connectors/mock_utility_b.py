@@ -1,5 +1,7 @@
+from datetime import date
 from typing import Tuple
 from .base import BaseConnector
+from .templates import RegexBillTemplate, AMOUNT
 
 
 # Different format - more compact, different field names
@@ -33,9 +35,28 @@ Pay by: Feb 15, 2025
 """
 
 
+def _parse_period_b(match):
+    """'01/01/2025 - 31/01/2025' (DD/MM/YYYY)."""
+    d1, m1, y1, d2, m2, y2 = (int(g) for g in match.groups())
+    return date(y1, m1, d1), date(y2, m2, d2)
+
+
+TEMPLATE_B = RegexBillTemplate(
+    name="utility_b",
+    period_pattern=r"^Period:\s*(\d{2})/(\d{2})/(\d{4})\s*-\s*(\d{2})/(\d{2})/(\d{4})\s*$",
+    parse_period=_parse_period_b,
+    section_start=r"^-+\s*BREAKDOWN\s*-+",
+    section_end=r"(?:=+\s*\n\s*)?AMOUNT DUE",
+    line_item_pattern=r"^(.+?)\.{2,}\s*" + AMOUNT + r"\s*$",
+    total_pattern=r"^AMOUNT DUE:\s*" + AMOUNT,
+)
+
+
 class MockUtilityBConnector(BaseConnector):
     """Mock connector B with different bill format."""
 
+    bill_template = TEMPLATE_B
+
     def fetch_bill_artifact(self, utility_account_id: int) -> Tuple[bytes, str]:
         """Return a mock bill in format B."""
         content = SAMPLE_BILL_B.strip().encode("utf-8")
@@ -1,6 +1,7 @@
 """Connector registry - maps providers to connector classes."""
-from typing import Dict, Type
+from typing import Dict, Optional, Type
 from .base import BaseConnector
+from .templates import RegexBillTemplate
 from .mock_utility_a import MockUtilityAConnector
 from .mock_utility_b import MockUtilityBConnector
 
@@ -18,3 +19,17 @@ def get_connector(provider: str) -> BaseConnector:
     """Get the appropriate connector for a provider."""
     connector_class = CONNECTOR_REGISTRY.get(provider, MockUtilityAConnector)
     return connector_class()
+
+
+def get_template(provider: str) -> Optional[RegexBillTemplate]:
+    """Get the bill template for a provider's connector, if it has one."""
+    connector_class = CONNECTOR_REGISTRY.get(provider, MockUtilityAConnector)
+    return connector_class.bill_template
+
+
+def extract_with_template(bill_text: str, provider: str) -> Optional[dict]:
+    """Parse a bill with its provider's template. None means use the LLM."""
+    template = get_template(provider)
+    if template is None:
+        return None
+    return template.extract(bill_text)
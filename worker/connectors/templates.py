@@ -0,0 +1,78 @@
+"""Deterministic bill templates - parse known connector formats without the LLM."""
+import re
+from datetime import date, datetime
+from typing import Callable, Optional, Pattern
+
+AMOUNT = r"\$\s*([\d,]+\.\d{2})"
+# Line items must add up to the total within a cent
+SUM_TOLERANCE = 0.01
+
+
+def parse_amount(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def parse_month_day_year(month: str, day: str, year: str) -> date:
+    """Parse 'Dec', '1', '2025' (or full month names)."""
+    for fmt in ("%b %d %Y", "%B %d %Y"):
+        try:
+            return datetime.strptime(f"{month} {day} {year}", fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {month} {day} {year}")
+
+
+class RegexBillTemplate:
+    """
+    Extracts a complete BillNormalized dict from one fixed bill layout.
+    
+    All patterns are compiled once. `extract` returns None whenever the text
+    doesn't match the layout or the line items don't add up to the total, so
+    the caller can fall back to the LLM.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        period_pattern: str,
+        parse_period: Callable[[re.Match], tuple],
+        section_start: str,
+        section_end: str,
+        line_item_pattern: str,
+        total_pattern: str,
+    ):
+        self.name = name
+        self.period_re: Pattern = re.compile(period_pattern, re.MULTILINE)
+        self.parse_period = parse_period
+        self.section_re: Pattern = re.compile(
+            section_start + r"\s*\n(.*?)^\s*" + section_end, re.MULTILINE | re.DOTALL
+        )
+        self.line_item_re: Pattern = re.compile(line_item_pattern, re.MULTILINE)
+        self.total_re: Pattern = re.compile(total_pattern, re.MULTILINE)
+
+    def extract(self, bill_text: str) -> Optional[dict]:
+        period = self.period_re.search(bill_text)
+        section = self.section_re.search(bill_text)
+        total = self.total_re.search(bill_text)
+        if not (period and section and total):
+            return None
+
+        try:
+            start, end = self.parse_period(period)
+        except ValueError:
+            return None
+
+        line_items = [
+            {"name": m.group(1).strip(), "amount": parse_amount(m.group(2))}
+            for m in self.line_item_re.finditer(section.group(1))
+        ]
+        total_amount = parse_amount(total.group(1))
+        if not line_items or abs(sum(i["amount"] for i in line_items) - total_amount) > SUM_TOLERANCE:
+            return None
+
+        return {
+            "billing_period_start": start.isoformat(),
+            "billing_period_end": end.isoformat(),
+            "total_amount": total_amount,
+            "line_items": line_items,
+        }
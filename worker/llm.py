@@ -1,14 +1,26 @@
 """LLM helper for bill extraction using Vertex AI Gemini."""
 import json
-import vertexai
-from vertexai.generative_models import GenerativeModel
+import time
+import asyncio
+import logging
+import threading
+from typing import List, Optional, Tuple
 
-from shared.config import GCP_PROJECT
+from shared.config import GCP_PROJECT, LLM_BATCH_CONCURRENCY, LLM_PACK_MAX_CHARS, LLM_COMPACT_PROMPTS, LLM_MAX_INPUT_TOKENS
+from .llm_cache import extraction_cache, cache_key
+from .ratelimit import get_rate_limiter, is_throttle_error
+from .preprocess import estimate_tokens, prepare_bill_text
 
-# Initialize Vertex AI
-vertexai.init(project=GCP_PROJECT, location="us-central1")
+logger = logging.getLogger(__name__)
 
-model = GenerativeModel("gemini-2.0-flash-001")
+MODEL_NAME = "gemini-2.0-flash-001"
+# Bump whenever EXTRACTION_PROMPT, build_prompt or bill preprocessing changes; it is part of the cache key
+PROMPT_VERSION = "2"
+# Answers from the packed multi-bill prompt are cached apart, so the single-bill path never serves them
+PACKED_PROMPT_VERSION = f"{PROMPT_VERSION}-packed"
+
+# Output tokens reserved per call before the real usage is known
+RESPONSE_TOKEN_ESTIMATE = 512
 
 EXTRACTION_PROMPT = """Extract the following information from this utility bill text and return ONLY valid JSON matching this schema:
 
@@ -28,18 +40,70 @@ Rules:
 - Include all line items/charges from the bill
 """
 
+PACKED_EXTRACTION_PROMPT = """Extract the following information from EACH utility bill below. Every bill starts with a line "### BILL <id>". Return ONLY a valid JSON array with one object per bill, matching this schema:
 
-def extract_bill_data(bill_text: str, provider: str = None) -> dict:
-    """Use LLM to extract structured data from bill text."""
+[
+  {
+    "id": "<bill id>",
+    "billing_period_start": "YYYY-MM-DD",
+    "billing_period_end": "YYYY-MM-DD",
+    "total_amount": <number>,
+    "line_items": [
+      {"name": "<charge name>", "amount": <number>}
+    ]
+  }
+]
+
+Rules:
+- Return ONLY the JSON array, no other text
+- Copy each bill's id exactly
+- For dates, use ISO format YYYY-MM-DD
+- For amounts, use numbers (not strings)
+- Include all line items/charges from each bill
+"""
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Vertex AI model, initialized on first use (vertexai import + init is slow)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            import vertexai
+            from vertexai.generative_models import GenerativeModel
+            vertexai.init(project=GCP_PROJECT, location="us-central1")
+            _model = GenerativeModel(MODEL_NAME)
+        return _model
+
+
+def build_prompt(bill_text: str, provider: str = None) -> str:
+    """Build the extraction prompt for a bill."""
     prompt = EXTRACTION_PROMPT
     
     if provider:
         prompt += f"\nProvider: {provider}\n"
     
     prompt += "\nBill text:\n" + bill_text
-    
-    response = model.generate_content(prompt)
-    response_text = response.text.strip()
+    return prompt
+
+
+def build_packed_prompt(bills: List[Tuple[str, str, Optional[str]]]) -> str:
+    """Build one prompt for several (id, bill_text, provider) bills."""
+    prompt = PACKED_EXTRACTION_PROMPT
+    for bill_id, bill_text, provider in bills:
+        prompt += f"\n### BILL {bill_id}\n"
+        if provider:
+            prompt += f"Provider: {provider}\n"
+        prompt += bill_text + "\n"
+    return prompt
+
+
+def parse_response(response_text: str) -> dict:
+    """Parse the model response into a dict."""
+    response_text = response_text.strip()
     
     # Clean up markdown code blocks
     if response_text.startswith("```"):
@@ -49,3 +113,185 @@ def extract_bill_data(bill_text: str, provider: str = None) -> dict:
         response_text = response_text.strip()
     
     return json.loads(response_text)
+
+
+def _total_tokens(response) -> int:
+    usage = getattr(response, "usage_metadata", None)
+    return getattr(usage, "total_token_count", 0) if usage else 0
+
+
+def generate(prompt: str) -> str:
+    """Call Gemini through the rate limiter, retrying throttled (429/503) calls."""
+    limiter = get_rate_limiter(MODEL_NAME)
+    prompt_tokens = estimate_tokens(prompt)
+    logger.info(f"LLM call: ~{prompt_tokens} prompt tokens")
+    estimated = prompt_tokens + RESPONSE_TOKEN_ESTIMATE
+    for attempt in range(limiter.max_retries + 1):
+        try:
+            with limiter.limit(estimated):
+                response = get_model().generate_content(prompt)
+            limiter.record_usage(estimated, _total_tokens(response))
+            return response.text
+        except Exception as e:
+            if not is_throttle_error(e) or attempt == limiter.max_retries:
+                raise
+            time.sleep(limiter.retry_delay(attempt))
+
+
+async def generate_async(prompt: str) -> str:
+    """Async version of generate()."""
+    limiter = get_rate_limiter(MODEL_NAME)
+    prompt_tokens = estimate_tokens(prompt)
+    logger.info(f"LLM call: ~{prompt_tokens} prompt tokens")
+    estimated = prompt_tokens + RESPONSE_TOKEN_ESTIMATE
+    for attempt in range(limiter.max_retries + 1):
+        try:
+            async with limiter.limit_async(estimated):
+                response = await get_model().generate_content_async(prompt)
+            limiter.record_usage(estimated, _total_tokens(response))
+            return response.text
+        except Exception as e:
+            if not is_throttle_error(e) or attempt == limiter.max_retries:
+                raise
+            await asyncio.sleep(limiter.retry_delay(attempt))
+
+
+def compact_for_llm(bill_text: str, compact: bool = LLM_COMPACT_PROMPTS) -> str:
+    """Strip decoration/boilerplate and enforce LLM_MAX_INPUT_TOKENS."""
+    if not compact:
+        return bill_text
+    compacted = prepare_bill_text(bill_text, LLM_MAX_INPUT_TOKENS)
+    logger.info(f"Bill compacted: ~{estimate_tokens(bill_text)} → ~{estimate_tokens(compacted)} tokens")
+    return compacted
+
+
+def extract_bill_data(bill_text: str, provider: str = None, use_cache: bool = True,
+                      compact: bool = LLM_COMPACT_PROMPTS) -> dict:
+    """Use LLM to extract structured data from bill text."""
+    bill_text = compact_for_llm(bill_text, compact)
+    use_cache = use_cache and extraction_cache is not None
+    if use_cache:
+        key = cache_key(bill_text, provider, PROMPT_VERSION, MODEL_NAME)
+        cached = extraction_cache.get(key)
+        if cached is not None:
+            return cached
+    
+    data = parse_response(generate(build_prompt(bill_text, provider)))
+    
+    if use_cache:
+        extraction_cache.put(key, data, provider, PROMPT_VERSION, MODEL_NAME)
+    return data
+
+
+async def extract_bill_data_async(bill_text: str, provider: str = None, use_cache: bool = True,
+                                  compact: bool = LLM_COMPACT_PROMPTS) -> dict:
+    """Async variant of extract_bill_data for the asyncio worker."""
+    bill_text = compact_for_llm(bill_text, compact)
+    use_cache = use_cache and extraction_cache is not None
+    if use_cache:
+        key = cache_key(bill_text, provider, PROMPT_VERSION, MODEL_NAME)
+        cached = await asyncio.to_thread(extraction_cache.get, key)
+        if cached is not None:
+            return cached
+    
+    data = parse_response(await generate_async(build_prompt(bill_text, provider)))
+    
+    if use_cache:
+        await asyncio.to_thread(extraction_cache.put, key, data, provider, PROMPT_VERSION, MODEL_NAME)
+    return data
+
+
+# ============================================================
+# BATCH EXTRACTION
+# ============================================================
+
+async def extract_bills_batch_async(
+    bills: List[Tuple[str, Optional[str]]],
+    max_concurrency: int = LLM_BATCH_CONCURRENCY,
+    pack_size: int = 1,
+    use_cache: bool = True,
+    compact: bool = LLM_COMPACT_PROMPTS,
+) -> List[dict]:
+    """
+    Extract many (bill_text, provider) bills with bounded concurrency.
+    
+    With pack_size > 1, bills up to LLM_PACK_MAX_CHARS are sent several per
+    prompt; any bill missing from a packed answer is retried on its own.
+    Returns one {"data": dict | None, "error": str | None} per input, in order.
+    """
+    use_cache = use_cache and extraction_cache is not None
+    # Compact once up front; cache keys then match the single-bill path
+    bills = [(compact_for_llm(bill_text, compact), provider) for bill_text, provider in bills]
+    results = [None] * len(bills)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_single(i: int):
+        bill_text, provider = bills[i]
+        async with semaphore:
+            try:
+                data = await extract_bill_data_async(bill_text, provider, use_cache=use_cache, compact=False)
+                results[i] = {"data": data, "error": None}
+            except Exception as e:
+                results[i] = {"data": None, "error": str(e)[:500]}
+
+    async def run_pack(indices: List[int]):
+        by_id = {}
+        async with semaphore:
+            try:
+                prompt = build_packed_prompt([(str(i), *bills[i]) for i in indices])
+                for item in parse_response(await generate_async(prompt)):
+                    if isinstance(item, dict) and "id" in item:
+                        by_id[str(item.pop("id"))] = item
+            except Exception as e:
+                logger.warning(f"Packed extraction of {len(indices)} bills failed, retrying them one by one: {e}")
+
+        missing = []
+        for i in indices:
+            data = by_id.get(str(i))
+            if data is None:
+                missing.append(i)
+                continue
+            results[i] = {"data": data, "error": None}
+            if use_cache:
+                bill_text, provider = bills[i]
+                key = cache_key(bill_text, provider, PACKED_PROMPT_VERSION, MODEL_NAME)
+                await asyncio.to_thread(extraction_cache.put, key, data, provider, PACKED_PROMPT_VERSION, MODEL_NAME)
+        await asyncio.gather(*(run_single(i) for i in missing))
+
+    if pack_size <= 1:
+        await asyncio.gather(*(run_single(i) for i in range(len(bills))))
+        return results
+
+    # Serve cache hits (single-bill or earlier packed answers) first so only uncached bills are packed
+    pending = []
+    for i, (bill_text, provider) in enumerate(bills):
+        cached = None
+        if use_cache:
+            for version in (PROMPT_VERSION, PACKED_PROMPT_VERSION):
+                cached = await asyncio.to_thread(extraction_cache.get, cache_key(bill_text, provider, version, MODEL_NAME))
+                if cached is not None:
+                    break
+        if cached is not None:
+            results[i] = {"data": cached, "error": None}
+        else:
+            pending.append(i)
+
+    small = [i for i in pending if len(bills[i][0]) <= LLM_PACK_MAX_CHARS]
+    large = [i for i in pending if len(bills[i][0]) > LLM_PACK_MAX_CHARS]
+    packs = [small[n:n + pack_size] for n in range(0, len(small), pack_size)]
+    await asyncio.gather(
+        *(run_pack(pack) for pack in packs),
+        *(run_single(i) for i in large),
+    )
+    return results
+
+
+def extract_bills_batch(
+    bills: List[Tuple[str, Optional[str]]],
+    max_concurrency: int = LLM_BATCH_CONCURRENCY,
+    pack_size: int = 1,
+    use_cache: bool = True,
+    compact: bool = LLM_COMPACT_PROMPTS,
+) -> List[dict]:
+    """Blocking wrapper around extract_bills_batch_async (not for use inside an event loop)."""
+    return asyncio.run(extract_bills_batch_async(bills, max_concurrency, pack_size, use_cache, compact))
@@ -0,0 +1,177 @@
+"""Content-addressed cache for LLM extraction results.
+
+Two tiers: an in-process LRU and a Postgres table shared by every worker.
+Keys hash (prompt version, model, provider, bill text), so changing the prompt
+or model naturally invalidates old entries.
+"""
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from shared.config import (
+    LLM_CACHE_ENABLED, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_SECONDS, LLM_CACHE_PERSISTENT, LLM_CACHE_PURGE_INTERVAL,
+)
+from shared.schemas import BillNormalized
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(bill_text: str, provider: str, prompt_version: str, model_name: str) -> str:
+    """SHA-256 over everything that determines the extraction output."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, model_name, provider or "", bill_text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """LRU + Postgres cache of extraction results, stored as JSON strings."""
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl_seconds: int = LLM_CACHE_TTL_SECONDS,
+                 persistent: bool = LLM_CACHE_PERSISTENT):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+        self._entries = OrderedDict()  # key -> (expires_at, payload)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        """Return the cached result dict, or None on a miss."""
+        payload = self._get_memory(key)
+        if payload is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return json.loads(payload)
+
+        if self.persistent:
+            payload = self._get_persistent(key)
+            if payload is not None:
+                self._put_memory(key, payload)
+                with self._lock:
+                    self.persistent_hits += 1
+                return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, data: dict, provider: str, prompt_version: str, model_name: str):
+        """
+        Store a result in both tiers.
+
+        Only results that validate as BillNormalized are stored, so a bad
+        extraction is retried on redelivery instead of being replayed.
+        """
+        try:
+            BillNormalized(**data)
+        except Exception:
+            return
+
+        payload = json.dumps(data)
+        self._put_memory(key, payload)
+        if self.persistent:
+            self._put_persistent(key, payload, provider, prompt_version, model_name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            hits = self.memory_hits + self.persistent_hits
+            return {
+                "entries": len(self._entries),
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            }
+
+    # --- in-process LRU ---
+
+    def _get_memory(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def _put_memory(self, key: str, payload: str):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # --- Postgres tier (failures never fail the job) ---
+
+    def _get_persistent(self, key: str):
+        from shared.database import get_db
+        from shared.orm_models import LLMExtractionCache
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl_seconds)
+        try:
+            with get_db() as db:
+                row = db.query(LLMExtractionCache.payload).filter(
+                    LLMExtractionCache.cache_key == key,
+                    LLMExtractionCache.created_at >= cutoff,
+                ).first()
+                return row.payload if row else None
+        except Exception as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    def _put_persistent(self, key: str, payload: str, provider: str, prompt_version: str, model_name: str):
+        from shared.database import get_db
+        from shared.orm_models import LLMExtractionCache
+        try:
+            with get_db() as db:
+                db.merge(LLMExtractionCache(
+                    cache_key=key,
+                    provider=provider,
+                    prompt_version=prompt_version,
+                    model_name=model_name,
+                    payload=payload,
+                    created_at=datetime.utcnow(),
+                ))
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+
+def purge_expired(ttl_seconds: int = LLM_CACHE_TTL_SECONDS) -> int:
+    """Delete persistent entries older than the TTL. Returns rows deleted."""
+    from shared.database import get_db
+    from shared.orm_models import LLMExtractionCache
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    with get_db() as db:
+        return db.query(LLMExtractionCache).filter(LLMExtractionCache.created_at < cutoff).delete()
+
+
+def start_cache_purger(interval: int = LLM_CACHE_PURGE_INTERVAL):
+    """Background thread deleting expired persistent entries every `interval` seconds (0 disables)."""
+    if interval <= 0 or not (LLM_CACHE_ENABLED and LLM_CACHE_PERSISTENT):
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                deleted = purge_expired()
+                if deleted:
+                    logger.info(f"LLM cache: purged {deleted} expired row(s)")
+            except Exception as e:
+                logger.error(f"LLM cache purge failed: {e}")
+
+    threading.Thread(target=run, name="llm-cache-purge", daemon=True).start()
+
+
+extraction_cache = ExtractionCache() if LLM_CACHE_ENABLED else None
@@ -2,43 +2,79 @@
 import json
 import re
 import time
+import signal
 import logging
+import threading
+import contextvars
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import update, func, or_
 from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1.subscriber.scheduler import ThreadScheduler
 
-from shared.config import GCP_PROJECT, PUBSUB_SUBSCRIPTION, MAX_JOB_ATTEMPTS
-from shared.database import get_db
+from shared.config import (
+    GCP_PROJECT, PUBSUB_SUBSCRIPTION, MAX_JOB_ATTEMPTS, JOB_LEASE_SECONDS,
+    WORKER_CONCURRENCY, WORKER_MAX_MESSAGES, WORKER_MAX_BYTES, DB_POOL_LOG_INTERVAL,
+)
+from shared.database import get_db, configure_engine, pool_stats
+from shared.events import job_status_notify
 from shared.schemas import BillNormalized
 
-from .storage import upload_to_gcs, download_from_gcs
-from .connectors import get_connector
-from .llm import extract_bill_data
-from .bigquery import insert_normalized_bill
+from .storage import upload_if_missing, download, content_hash, content_addressed_path
+from .connectors import get_connector, extract_with_template
+from .llm import extract_bill_data, MODEL_NAME
+from .ratelimit import get_rate_limiter
+from .llm_cache import extraction_cache, start_cache_purger
+from .bigquery import close_writer, writer_stats
+from .sinks import bigquery_rows, start_bigquery_sink, finish_bigquery_sink, start_outbox_relay
 
 # ============================================================
 # LOGGING SETUP
 # ============================================================
 
 class JobContext:
-    """Thread-local job context for logging."""
-    job_id = "N/A"
+    """Per-job context for logging, isolated between concurrent callbacks."""
+    _job_id = contextvars.ContextVar("job_id", default="N/A")
+
+    @classmethod
+    def get(cls):
+        return cls._job_id.get()
+
+    @classmethod
+    def set(cls, job_id) -> contextvars.Token:
+        return cls._job_id.set(job_id)
+
+    @classmethod
+    def reset(cls, token: contextvars.Token):
+        cls._job_id.reset(token)
 
 class JobIdFilter(logging.Filter):
     def filter(self, record):
-        record.job_id = JobContext.job_id
+        record.job_id = JobContext.get()
         return True
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - [job_id=%(job_id)s] %(message)s"
 )
+# Filter on the handlers so records from every worker module get a job_id
+for handler in logging.getLogger().handlers:
+    handler.addFilter(JobIdFilter())
 logger = logging.getLogger(__name__)
-logger.addFilter(JobIdFilter())
+
+# Pub/Sub caps an ack deadline at 10 minutes; postponed redeliveries wait at least 10s
+MAX_ACK_DEADLINE_SECONDS = 600
+MIN_REDELIVERY_DELAY_SECONDS = 10
 
 
 # ============================================================
 # DATABASE OPERATIONS (ORM)
 # ============================================================
 
+class LeaseLost(Exception):
+    """The job's lease expired and another attempt claimed it; this attempt must not write."""
+
+
 def get_job_info(job_id: int) -> dict:
     """Get job info including attempt count and status."""
     from shared.orm_models import IngestionJob
@@ -48,76 +84,204 @@ def get_job_info(job_id: int) -> dict:
             return {
                 "status": job.status,
                 "attempt_count": job.attempt_count or 0,
-                "utility_account_id": job.utility_account_id
+                "utility_account_id": job.utility_account_id,
+                "updated_at": job.updated_at,
             }
         return None
 
 
-def get_account_info(utility_account_id: int) -> dict:
-    """Get utility account info."""
-    from shared.orm_models import UtilityAccount
+def claim_job(job_id: int) -> dict:
+    """
+    Atomically move a job to RUNNING and return what the worker needs to run it.
+    
+    A single conditional UPDATE ... FROM utility_accounts ... RETURNING, so the
+    status check, attempt increment and account lookup cost one round-trip and
+    two deliveries of the same message can never both claim the job. A RUNNING
+    job can only be reclaimed once its lease (JOB_LEASE_SECONDS) has expired.
+    
+    Returns None if the job is missing, SUCCEEDED, out of attempts or leased.
+    """
+    from shared.orm_models import IngestionJob, UtilityAccount
+    
+    now = datetime.utcnow()
+    lease_cutoff = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    attempt_count = func.coalesce(IngestionJob.attempt_count, 0)
+    
+    stmt = (
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            IngestionJob.utility_account_id == UtilityAccount.id,
+            IngestionJob.status != "SUCCEEDED",
+            attempt_count < MAX_JOB_ATTEMPTS,
+            or_(IngestionJob.status != "RUNNING", IngestionJob.updated_at < lease_cutoff),
+        )
+        .values(status="RUNNING", attempt_count=attempt_count + 1, error_message=None, updated_at=now)
+        .returning(IngestionJob.attempt_count, UtilityAccount.provider, UtilityAccount.customer_id, job_status_notify())
+        .execution_options(synchronize_session=False)
+    )
     with get_db() as db:
-        account = db.query(UtilityAccount).filter(UtilityAccount.id == utility_account_id).first()
-        if account:
-            return {"provider": account.provider, "customer_id": account.customer_id}
-        # Fallback for dev/test if not found (though should exist)
-        return {"provider": "MOCK_A", "customer_id": 1}
+        row = db.execute(stmt).first()
+    
+    if not row:
+        return None
+    return {"attempt_count": row.attempt_count, "provider": row.provider, "customer_id": row.customer_id}
+
+
+def resolve_unclaimed_job(job_id: int) -> int:
+    """
+    Work out why claim_job refused a job.
+    
+    Returns None to ack, or how many seconds to postpone redelivery (via
+    modify_ack_deadline) while another worker holds the lease. A nack would
+    redeliver at once and spin on the leased job.
+    """
+    job_info = get_job_info(job_id)
+    
+    if not job_info:
+        logger.error("Job not found in database")
+        return None
+    
+    # Idempotency check
+    if job_info["status"] == "SUCCEEDED":
+        logger.info("Already succeeded, skipping")
+        return None
+    
+    # Another worker holds the lease (possibly on its last attempt); come back
+    # when it runs out, in case that worker dies
+    remaining = JOB_LEASE_SECONDS
+    if job_info["updated_at"]:
+        remaining -= (datetime.utcnow() - job_info["updated_at"]).total_seconds()
+    if job_info["status"] == "RUNNING" and remaining > 0:
+        delay = int(min(MAX_ACK_DEADLINE_SECONDS, max(MIN_REDELIVERY_DELAY_SECONDS, remaining)))
+        logger.info(f"Job is running on another worker, retrying in {delay}s")
+        return delay
+    
+    # Retry limit: only a job nobody holds any more can be failed for good
+    if job_info["attempt_count"] >= MAX_JOB_ATTEMPTS:
+        logger.error(f"Exceeded {MAX_JOB_ATTEMPTS} attempts")
+        update_job(job_id, "FAILED", "Exceeded retry limit", abandoned_only=True)
+        return None
+    
+    # The job changed between claim and lookup; try again shortly
+    logger.info(f"Job could not be claimed ({job_info['status']}), retrying in {MIN_REDELIVERY_DELAY_SECONDS}s")
+    return MIN_REDELIVERY_DELAY_SECONDS
 
 
-def update_job(job_id: int, status: str, error: str = None, increment_attempt: bool = False):
-    """Update job status using ORM."""
+def update_job(job_id: int, status: str, error: str = None, attempt_count: int = None, abandoned_only: bool = False):
+    """
+    Update job status with a single UPDATE statement (API listeners are notified on commit).
+    
+    Never overwrites SUCCEEDED. With `attempt_count`, only the attempt that still
+    holds the job (RUNNING, same attempt) can change it; with `abandoned_only`,
+    a RUNNING job is only changed once its lease has expired. Returns True if a row changed.
+    """
     from shared.orm_models import IngestionJob
-    from datetime import datetime
+    
+    conditions = [IngestionJob.id == job_id, IngestionJob.status != "SUCCEEDED"]
+    if attempt_count is not None:
+        conditions += [IngestionJob.status == "RUNNING", IngestionJob.attempt_count == attempt_count]
+    if abandoned_only:
+        lease_cutoff = datetime.utcnow() - timedelta(seconds=JOB_LEASE_SECONDS)
+        conditions.append(or_(IngestionJob.status != "RUNNING", IngestionJob.updated_at < lease_cutoff))
+    
+    values = {"status": status, "updated_at": datetime.utcnow()}
+    if error:
+        values["error_message"] = error
+    elif status == "RUNNING" or status == "SUCCEEDED":
+        values["error_message"] = None
     
     with get_db() as db:
-        job = db.query(IngestionJob).filter(IngestionJob.id == job_id).first()
-        if not job:
-            return
-
-        job.status = status
-        job.updated_at = datetime.utcnow()
-        
-        if increment_attempt:
-            job.attempt_count = (job.attempt_count or 0) + 1
-            
-        if error:
-            job.error_message = error
-        elif status == "RUNNING" or status == "SUCCEEDED":
-            job.error_message = None
-            
-        # No need to call db.commit() explicitly as context manager handles it
-        # but db.add(job) is good practice though query results are tracked
-        db.add(job)
+        row = db.execute(
+            update(IngestionJob)
+            .where(*conditions)
+            .values(**values)
+            .returning(job_status_notify())
+            .execution_options(synchronize_session=False)
+        ).first()
+    return row is not None
+
+
+def complete_job(job_id: int, records: list, attempt_count: int):
+    """
+    Persist the job's artifacts/bills and mark it SUCCEEDED in one transaction.
+
+    Only the attempt that still holds the job may complete it: if its lease was
+    lost to another attempt, nothing is written and LeaseLost is raised.
+    The SQL commit decides the job's outcome. BigQuery rows are built up front
+    but only written once it has committed, and BigQuery failures go to the
+    outbox (see worker.sinks).
+    """
+    from shared.orm_models import IngestionJob
+    rows = bigquery_rows(records)
+    with get_db() as db:
+        row = db.execute(
+            update(IngestionJob)
+            .where(
+                IngestionJob.id == job_id,
+                IngestionJob.status == "RUNNING",
+                IngestionJob.attempt_count == attempt_count,
+            )
+            .values(status="SUCCEEDED", error_message=None, updated_at=datetime.utcnow())
+            .returning(job_status_notify())
+            .execution_options(synchronize_session=False)
+        ).first()
+        if row is None:
+            raise LeaseLost(f"Attempt {attempt_count} no longer holds the job")  # rolls back the transaction
+        db.add_all(records)
+    logger.info(f"Saved {len(records)} record(s) to Cloud SQL")
+    finish_bigquery_sink(start_bigquery_sink(rows))
+
+
+def artifact_record(job_id: int, utility_account_id: int, gcs_path: str, artifact_type: str, content_hash: str = None):
+    """Build (but don't save) artifact metadata."""
+    from shared.orm_models import Artifact
+    return Artifact(
+        job_id=job_id,
+        utility_account_id=utility_account_id,
+        gcs_path=gcs_path,
+        artifact_type=artifact_type,
+        content_hash=content_hash
+    )
 
 
-def save_artifact(job_id: int, utility_account_id: int, gcs_path: str, artifact_type: str):
-    """Save artifact metadata."""
-    from shared.orm_models import Artifact
-    with get_db() as db:
-        artifact = Artifact(
-            job_id=job_id,
-            utility_account_id=utility_account_id,
-            gcs_path=gcs_path,
-            artifact_type=artifact_type
-        )
-        db.add(artifact)
-    logger.info(f"Saved artifact: {gcs_path}")
+def normalized_bill_record(job_id: int, customer_id: int, utility_account_id: int, validated: BillNormalized,
+                           content_hash: str = None, export_to_bigquery: bool = True):
+    """Build (but don't save) a normalized bill row; complete_job also sends it to BigQuery unless told not to."""
+    from shared.orm_models import NormalizedBillSQL
+    return NormalizedBillSQL(
+        job_id=job_id,
+        customer_id=customer_id,
+        utility_account_id=utility_account_id,
+        billing_period_start=str(validated.billing_period_start),
+        billing_period_end=str(validated.billing_period_end),
+        total_amount=validated.total_amount,
+        json_payload=validated.model_dump(mode="json"),  # JSONB
+        content_hash=content_hash,
+        export_to_bigquery=export_to_bigquery,
+    )
 
 
-def save_normalized_bill(customer_id: int, utility_account_id: int, bill_data: dict, json_payload: str):
-    """Save normalized bill to Cloud SQL using ORM."""
+def reuse_parsed_bill(content_hash: str, utility_account_id: int) -> tuple:
+    """
+    Look for an earlier successful parse of byte-identical bill content.
+    
+    Returns (validated, same_account). `validated` is None when nothing can be
+    reused; `same_account` means this account already has the bill, so the job's
+    copy must not be exported to BigQuery again.
+    """
     from shared.orm_models import NormalizedBillSQL
     with get_db() as db:
-        bill = NormalizedBillSQL(
-            customer_id=customer_id,
-            utility_account_id=utility_account_id,
-            billing_period_start=bill_data["billing_period_start"],
-            billing_period_end=bill_data["billing_period_end"],
-            total_amount=bill_data["total_amount"],
-            json_payload=json_payload
-        )
-        db.add(bill)
-    logger.info("Saved normalized bill to Cloud SQL")
+        row = db.query(NormalizedBillSQL.utility_account_id, NormalizedBillSQL.json_payload).filter(
+            NormalizedBillSQL.content_hash == content_hash
+        ).order_by(
+            (NormalizedBillSQL.utility_account_id == utility_account_id).desc(),
+            NormalizedBillSQL.created_at.desc(),
+        ).first()
+    
+    if not row:
+        return None, False
+    return BillNormalized.model_validate(row.json_payload), row.utility_account_id == utility_account_id
 
 
 # ============================================================
@@ -146,60 +310,124 @@ def extract_total_fallback(bill_text: str) -> float:
 # JOB PROCESSORS
 # ============================================================
 
-def process_ingest(job_id: int, utility_account_id: int, provider: str) -> str:
-    """Ingest bill from provider and upload to GCS."""
+# FULL_PIPELINE uploads raw bills here while the parse runs on the job thread
+upload_executor = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="upload")
+
+
+def fetch_bill(utility_account_id: int, provider: str) -> bytes:
+    """Fetch the raw bill from the provider's connector."""
     connector = get_connector(provider)
     logger.info(f"Using connector for provider: {provider}")
     
     content, _ = connector.fetch_bill_artifact(utility_account_id)
-    gcs_path = f"raw/bills/{job_id}.txt"
-    full_path = upload_to_gcs(content, gcs_path)
-    
-    save_artifact(job_id, utility_account_id, full_path, "raw_bill")
-    logger.info(f"Uploaded to {full_path}")
-    return full_path
+    return content
 
 
-def process_parse(job_id: int, customer_id: int, utility_account_id: int, gcs_path: str, provider: str):
-    """Parse bill with LLM and save results."""
-    bill_bytes = download_from_gcs(gcs_path)
-    bill_text = bill_bytes.decode("utf-8")
-    logger.info(f"Downloaded bill ({len(bill_text)} chars)")
+def store_bill(job_id: int, utility_account_id: int, content: bytes, digest: str = None):
+    """Upload a raw bill under its content hash (skipped if present). Returns the Artifact to save."""
+    digest = digest or content_hash(content)
+    full_path, uploaded = upload_if_missing(content, content_addressed_path(digest))
     
-    # Try LLM extraction with Pydantic validation
+    if uploaded:
+        logger.info(f"Uploaded to {full_path}")
+    else:
+        logger.info(f"Identical bill already stored at {full_path}, skipped upload")
+    return artifact_record(job_id, utility_account_id, full_path, "raw_bill", digest)
+
+
+def process_ingest(job_id: int, utility_account_id: int, provider: str):
+    """Ingest bill from provider and store it. Returns the Artifact to save."""
+    content = fetch_bill(utility_account_id, provider)
+    return store_bill(job_id, utility_account_id, content)
+
+
+def parse_with_template(bill_text: str, provider: str) -> BillNormalized:
+    """Fast path for known connector layouts. Returns None to fall back to the LLM."""
+    extracted = extract_with_template(bill_text, provider)
+    if extracted is None:
+        return None
     try:
-        extracted = extract_bill_data(bill_text, provider=provider)
         validated = BillNormalized(**extracted)
-        logger.info(f"Extracted: total=${validated.total_amount}, items={len(validated.line_items)}")
-        
-    except Exception as llm_error:
-        logger.warning(f"LLM extraction failed: {llm_error}, trying fallback...")
-        
-        fallback_amount = extract_total_fallback(bill_text)
-        if fallback_amount:
-            logger.info(f"Fallback extracted total_amount: {fallback_amount}")
-            # Could create partial result here, but for now we fail to trigger retry
-        raise
+    except ValueError:
+        return None
+    logger.info(f"Template parsed: total=${validated.total_amount}, items={len(validated.line_items)}")
+    return validated
+
+
+def log_extraction_fallback(bill_text: str, llm_error: Exception):
+    """Log the regex fallback total when LLM extraction fails."""
+    logger.warning(f"LLM extraction failed: {llm_error}, trying fallback...")
     
-    json_payload = validated.model_dump_json()
+    fallback_amount = extract_total_fallback(bill_text)
+    if fallback_amount:
+        logger.info(f"Fallback extracted total_amount: {fallback_amount}")
+        # Could create partial result here, but for now we fail to trigger retry
+
+
+def extract_bill(bill_text: str, provider: str) -> BillNormalized:
+    """Template fast path, else LLM extraction with Pydantic validation."""
+    # Known formats never need the LLM
+    validated = parse_with_template(bill_text, provider)
+    if validated is None:
+        # Try LLM extraction with Pydantic validation
+        try:
+            extracted = extract_bill_data(bill_text, provider=provider)
+            validated = BillNormalized(**extracted)
+            logger.info(f"Extracted: total=${validated.total_amount}, items={len(validated.line_items)}")
+            
+        except Exception as llm_error:
+            log_extraction_fallback(bill_text, llm_error)
+            raise
     
-    # Save to SQL and BigQuery
-    save_normalized_bill(customer_id, utility_account_id, extracted, json_payload)
-    insert_normalized_bill(
-        customer_id=customer_id,
-        utility_account_id=utility_account_id,
-        billing_period_start=str(validated.billing_period_start),
-        billing_period_end=str(validated.billing_period_end),
-        total_amount=validated.total_amount,
-        json_payload=json_payload,
-    )
-    logger.info("Saved to BigQuery")
+    return validated
 
 
-def process_full_pipeline(job_id: int, utility_account_id: int, customer_id: int, provider: str):
-    """Full pipeline: ingest → parse."""
-    gcs_path = process_ingest(job_id, utility_account_id, provider)
-    process_parse(job_id, customer_id, utility_account_id, gcs_path, provider)
+def process_parse(job_id: int, customer_id: int, utility_account_id: int, gcs_path: str, provider: str) -> list:
+    """Parse a stored bill. Returns the NormalizedBillSQL rows to save."""
+    bill_bytes = download(gcs_path)
+    bill_text = bill_bytes.decode("utf-8")
+    logger.info(f"Downloaded bill ({len(bill_text)} chars)")
+    
+    digest = content_hash(bill_bytes)
+    validated, same_account = reuse_parsed_bill(digest, utility_account_id)
+    if same_account:
+        logger.info("Identical bill already parsed for this account, linking a copy to this job")
+    elif validated is not None:
+        logger.info("Reusing parse of an identical bill")
+    else:
+        validated = extract_bill(bill_text, provider)
+    
+    return [normalized_bill_record(job_id, customer_id, utility_account_id, validated, digest,
+                                   export_to_bigquery=not same_account)]
+
+
+def process_full_pipeline(job_id: int, utility_account_id: int, customer_id: int, provider: str) -> list:
+    """
+    Full pipeline: ingest → parse. Returns the records to save.
+    
+    The fetched bytes are parsed in memory while the artifact upload runs alongside;
+    results are only written once the upload has finished, so the raw bill is
+    always durable before anything derived from it.
+    """
+    content = fetch_bill(utility_account_id, provider)
+    digest = content_hash(content)
+    upload = upload_executor.submit(
+        contextvars.copy_context().run, store_bill, job_id, utility_account_id, content, digest
+    )
+    
+    validated, same_account = reuse_parsed_bill(digest, utility_account_id)
+    if same_account:
+        # Still write the job's own row (a copy), so its result is looked up by job_id
+        logger.info("Identical bill already parsed for this account, linking a copy to this job")
+    elif validated is not None:
+        logger.info("Reusing parse of an identical bill")
+    else:
+        validated = extract_bill(content.decode("utf-8"), provider)
+    artifact = upload.result()
+    
+    bill = normalized_bill_record(job_id, customer_id, utility_account_id, validated, digest,
+                                  export_to_bigquery=not same_account)
+    return [artifact, bill]
 
 
 # ============================================================
@@ -210,6 +438,8 @@ def handle_message(message):
     """Process a Pub/Sub message."""
     start = time.time()
     job_id = None
+    claim = None
+    context_token = JobContext.set("N/A")
     
     try:
         data = json.loads(message.data.decode("utf-8"))
@@ -217,82 +447,128 @@ def handle_message(message):
         job_type = data.get("job_type")
         utility_account_id = data.get("utility_account_id")
         
-        JobContext.job_id = job_id
+        JobContext.set(job_id)
         logger.info(f"Received: type={job_type}")
         
-        # Get job info
-        job_info = get_job_info(job_id)
-        if not job_info:
-            logger.error("Job not found in database")
-            message.ack()
-            return
-        
-        # Idempotency check
-        if job_info["status"] == "SUCCEEDED":
-            logger.info("Already succeeded, skipping")
-            message.ack()
+        # Claim: PENDING/FAILED → RUNNING, returns account info in the same round-trip
+        claim = claim_job(job_id)
+        if not claim:
+            delay = resolve_unclaimed_job(job_id)
+            if delay is None:
+                message.ack()
+            else:
+                # Stop the client extending the lease, then let it lapse in `delay` seconds
+                message.drop()
+                message.modify_ack_deadline(delay)
             return
         
-        # Retry limit
-        if job_info["attempt_count"] >= MAX_JOB_ATTEMPTS:
-            logger.error(f"Exceeded {MAX_JOB_ATTEMPTS} attempts")
-            update_job(job_id, "FAILED", "Exceeded retry limit")
-            message.ack()
-            return
-        
-        # Get account info
-        account_info = get_account_info(utility_account_id)
-        customer_id = data.get("customer_id") or account_info["customer_id"]
-        provider = account_info["provider"]
-        
-        # Start processing
-        update_job(job_id, "RUNNING", increment_attempt=True)
-        logger.info(f"RUNNING (attempt {job_info['attempt_count'] + 1})")
+        customer_id = data.get("customer_id") or claim["customer_id"]
+        provider = claim["provider"]
+        logger.info(f"RUNNING (attempt {claim['attempt_count']})")
         
         # Route by job type
+        records = []
         if job_type == "INGEST_BILL":
-            process_ingest(job_id, utility_account_id, provider)
+            records.append(process_ingest(job_id, utility_account_id, provider))
         elif job_type == "PARSE_BILL":
             gcs_path = data.get("artifact_path")
-            process_parse(job_id, customer_id, utility_account_id, gcs_path, provider)
+            records.extend(process_parse(job_id, customer_id, utility_account_id, gcs_path, provider))
         elif job_type == "FULL_PIPELINE":
-            process_full_pipeline(job_id, utility_account_id, customer_id, provider)
+            records.extend(process_full_pipeline(job_id, utility_account_id, customer_id, provider))
         
-        # Success
-        update_job(job_id, "SUCCEEDED")
+        # Success: results and SUCCEEDED status commit together
+        complete_job(job_id, records, claim["attempt_count"])
         duration = int((time.time() - start) * 1000)
         logger.info(f"SUCCEEDED ({duration}ms)")
         message.ack()
         
+    except LeaseLost as e:
+        # The attempt that took over owns the job (and its own delivery) now
+        logger.warning(f"Lease lost, discarding results: {e}")
+        message.ack()
     except Exception as e:
         duration = int((time.time() - start) * 1000)
         error = str(e)[:500]
         logger.error(f"FAILED: {error} ({duration}ms)")
         
-        if job_id:
-            update_job(job_id, "FAILED", error)
+        if claim:
+            update_job(job_id, "FAILED", error, claim["attempt_count"])
         message.nack()
+    finally:
+        # Callback threads are pooled, so never leak a job_id into the next message
+        JobContext.reset(context_token)
 
 
 # ============================================================
 # MAIN
 # ============================================================
 
+def start_stats_logger():
+    """Log DB pool, LLM cache, rate limiter and BigQuery writer stats every DB_POOL_LOG_INTERVAL seconds."""
+    if DB_POOL_LOG_INTERVAL <= 0:
+        return
+
+    def run():
+        while True:
+            time.sleep(DB_POOL_LOG_INTERVAL)
+            logger.info(f"DB pool: {pool_stats()}")
+            if extraction_cache is not None:
+                logger.info(f"LLM cache: {extraction_cache.stats()}")
+            logger.info(f"LLM rate limit: {get_rate_limiter(MODEL_NAME).stats()}")
+            if writer_stats() is not None:
+                logger.info(f"BigQuery writer: {writer_stats()}")
+
+    threading.Thread(target=run, name="stats", daemon=True).start()
+
+
 def main():
     """Start the worker."""
-    logger.info(f"Starting worker (subscription: {PUBSUB_SUBSCRIPTION})")
+    configure_engine("worker")
+    start_stats_logger()
+    start_outbox_relay()
+    start_cache_purger()
+    
+    logger.info(
+        f"Starting worker (subscription: {PUBSUB_SUBSCRIPTION}, "
+        f"concurrency={WORKER_CONCURRENCY}, max_messages={WORKER_MAX_MESSAGES})"
+    )
     
     subscriber = pubsub_v1.SubscriberClient()
     path = subscriber.subscription_path(GCP_PROJECT, PUBSUB_SUBSCRIPTION)
     
-    future = subscriber.subscribe(path, callback=handle_message)
+    # Bounded executor: at most WORKER_CONCURRENCY jobs run at once, and flow
+    # control stops Pub/Sub from leasing more messages than we can work on.
+    executor = ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY, thread_name_prefix="job")
+    flow_control = pubsub_v1.types.FlowControl(
+        max_messages=WORKER_MAX_MESSAGES,
+        max_bytes=WORKER_MAX_BYTES,
+    )
+    
+    future = subscriber.subscribe(
+        path,
+        callback=handle_message,
+        flow_control=flow_control,
+        scheduler=ThreadScheduler(executor=executor),
+        await_callbacks_on_shutdown=True,
+    )
     logger.info("Listening for messages...")
     
+    # SIGTERM (Cloud Run, supervisor) and Ctrl+C both trigger a graceful drain
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: shutdown.set())
+    
     try:
-        future.result()
+        while not shutdown.wait(timeout=1):
+            if future.done():
+                break
     except KeyboardInterrupt:
-        future.cancel()
-        logger.info("Worker stopped")
+        pass
+    
+    logger.info("Shutting down, draining in-flight messages...")
+    future.cancel()
+    future.result()  # Blocks until running callbacks have finished
+    close_writer()  # Flush rows the finished jobs enqueued
+    logger.info("Worker stopped")
 
 
 if __name__ == "__main__":
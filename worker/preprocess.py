@@ -0,0 +1,81 @@
+"""Bill text preprocessing - shrink bills before they reach the LLM."""
+import re
+
+# Lines made only of box-drawing/decoration characters (=====, *****, -----)
+DECORATION_RE = re.compile(r"^[\s=*\-_#~+|.]*$")
+# "*   UTILITY PROVIDER B - INVOICE   *" → "UTILITY PROVIDER B - INVOICE"
+FRAME_RE = re.compile(r"^[*|#]+\s*(.*?)\s*[*|#]+$")
+# "----- BREAKDOWN -----" → "BREAKDOWN"
+HEADER_RE = re.compile(r"^[-=*]{2,}\s*(.*?)\s*[-=*]{2,}$")
+# Dotted leaders: "Service Fee.............. $15.50" → "Service Fee $15.50"
+LEADER_RE = re.compile(r"\s*\.{2,}\s*(?=\$)")
+WHITESPACE_RE = re.compile(r"[ \t]+")
+# Marketing/boilerplate and fields the extraction schema never uses
+IRRELEVANT_LINE_RE = re.compile(
+    r"^(thank you|visit us|go paperless|questions\?|call us|www\.|http"
+    r"|account number|customer #|service address|location:"
+    r"|previous reading|current reading|start meter|end meter)",
+    re.IGNORECASE,
+)
+
+TRUNCATION_MARKER = "[... {count} lines omitted ...]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def compact_bill_text(bill_text: str) -> str:
+    """Normalize whitespace and drop decoration and boilerplate lines."""
+    lines = []
+    for line in bill_text.splitlines():
+        line = WHITESPACE_RE.sub(" ", line).strip()
+        if DECORATION_RE.match(line):
+            continue
+        line = FRAME_RE.sub(r"\1", line)
+        line = HEADER_RE.sub(r"\1", line)
+        line = LEADER_RE.sub(" ", line)
+        if not line or IRRELEVANT_LINE_RE.match(line):
+            continue
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def truncate_to_budget(bill_text: str, max_tokens: int) -> str:
+    """
+    Cut a bill down to roughly `max_tokens`, on line boundaries.
+
+    Keeps the head (period, first charges) and the tail (totals usually come
+    last) and marks the gap, so the model knows content was removed.
+    """
+    if estimate_tokens(bill_text) <= max_tokens:
+        return bill_text
+
+    lines = bill_text.splitlines()
+    budget_chars = max_tokens * 4
+    head_budget = budget_chars * 3 // 5
+    tail_budget = budget_chars - head_budget
+
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > head_budget:
+            break
+        head.append(line)
+        used += len(line) + 1
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > tail_budget:
+            break
+        tail.append(line)
+        used += len(line) + 1
+    tail.reverse()
+
+    omitted = len(lines) - len(head) - len(tail)
+    return "\n".join(head + [TRUNCATION_MARKER.format(count=omitted)] + tail)
+
+
+def prepare_bill_text(bill_text: str, max_tokens: int) -> str:
+    """Compact, then enforce the token budget."""
+    return truncate_to_budget(compact_bill_text(bill_text), max_tokens)
@@ -0,0 +1,170 @@
+"""Client-side rate limiting for Vertex AI calls.
+
+Each model gets a token bucket for requests/min and tokens/min plus an AIMD
+concurrency limit: the limit grows by ~1 per window of successful calls and is
+halved on 429/503, so throughput settles just under the quota ceiling.
+Limits are per worker process and shared by all of its jobs.
+"""
+import time
+import random
+import asyncio
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+from google.api_core import exceptions as gcp_exceptions
+
+from shared.config import LLM_RATE_LIMITS
+
+# Errors that mean "slow down" rather than "this request is bad"
+THROTTLE_ERRORS = (
+    gcp_exceptions.ResourceExhausted,   # 429
+    gcp_exceptions.TooManyRequests,     # 429
+    gcp_exceptions.ServiceUnavailable,  # 503
+)
+
+
+def is_throttle_error(error: Exception) -> bool:
+    return isinstance(error, THROTTLE_ERRORS)
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, bursting up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` units now and return how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float):
+        """Give back (or, with a negative amount, take) units after the fact."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AIMDLimiter:
+    """Adaptive concurrency limit: additive increase, multiplicative decrease."""
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, backoff: float = 0.5, cooldown: float = 5.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.throttled = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False):
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                self.throttled += 1
+                # One decrease per cooldown, or a burst of 429s collapses the limit to the floor
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+
+class ModelRateLimiter:
+    """Request/token buckets and adaptive concurrency for one model."""
+
+    def __init__(self, model_name: str, rpm: int, tpm: int, initial_concurrency: int,
+                 min_concurrency: int, max_concurrency: int, max_retries: int):
+        self.model_name = model_name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AIMDLimiter(initial_concurrency, min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def retry_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter for throttled calls."""
+        return min(30.0, 2 ** attempt) * (0.5 + random.random() / 2)
+
+    @contextmanager
+    def limit(self, estimated_tokens: int):
+        """Blocking slot for one call; records the outcome for AIMD."""
+        self.concurrency.acquire()
+        throttled = False
+        try:
+            time.sleep(self._reserve(estimated_tokens))
+            yield
+        except Exception as e:
+            throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.concurrency.release(throttled)
+
+    @asynccontextmanager
+    async def limit_async(self, estimated_tokens: int):
+        """Event-loop friendly version of limit()."""
+        while not self.concurrency.try_acquire():
+            await asyncio.sleep(0.05)
+        throttled = False
+        try:
+            await asyncio.sleep(self._reserve(estimated_tokens))
+            yield
+        except Exception as e:
+            throttled = is_throttle_error(e)
+            raise
+        finally:
+            self.concurrency.release(throttled)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real usage is known."""
+        if actual_tokens:
+            self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def stats(self) -> dict:
+        return {
+            "model": self.model_name,
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "throttled": self.concurrency.throttled,
+            "rpm": int(self.requests.capacity),
+            "tpm": int(self.tokens.capacity),
+        }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name: str) -> ModelRateLimiter:
+    """Per-process limiter for a model, configured from LLM_RATE_LIMITS."""
+    with _limiters_lock:
+        if model_name not in _limiters:
+            config = {**LLM_RATE_LIMITS["default"], **LLM_RATE_LIMITS.get(model_name, {})}
+            _limiters[model_name] = ModelRateLimiter(model_name, **config)
+        return _limiters[model_name]
@@ -0,0 +1,162 @@
+"""Result sinks - Cloud SQL (authoritative), then BigQuery.
+
+A job succeeds when its Cloud SQL transaction commits. BigQuery rows are built
+before that transaction but only handed to the writer once it has committed, so
+BigQuery never holds a bill Cloud SQL rolled back. A row BigQuery
+rejects, or that is still failing after the writer's retries, goes to the
+bigquery_outbox table instead of failing the job. The LLM result it came from
+is never thrown away. The outbox relay retries those rows in the background.
+"""
+import json
+import time
+import logging
+import threading
+from concurrent.futures import wait
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from shared.config import BQ_BATCH_ENABLED, BQ_BATCH_WAIT, BQ_OUTBOX_INTERVAL, BQ_OUTBOX_BATCH_SIZE
+from shared.database import get_db
+
+from .bigquery import write_row, insert_rows, normalized_bill_row, table_id
+
+logger = logging.getLogger(__name__)
+
+# Backoff for relayed rows: 1 min, 2 min, 4 min ... capped at 1 hour
+OUTBOX_MAX_DELAY_SECONDS = 3600
+
+
+# ============================================================
+# FAN-OUT
+# ============================================================
+
+def bigquery_rows(records: list) -> list:
+    """(row_id, row) for every normalized bill among a job's records."""
+    from shared.orm_models import NormalizedBillSQL
+    rows = []
+    for record in records:
+        if not isinstance(record, NormalizedBillSQL) or not record.export_to_bigquery:
+            continue
+        # Same account + same bill → same insertId, so a redelivered job doesn't duplicate the row
+        row_id = f"{record.utility_account_id}:{record.content_hash}" if record.content_hash else None
+        rows.append((row_id, normalized_bill_row(
+            record.customer_id, record.utility_account_id, record.billing_period_start,
+            record.billing_period_end, record.total_amount, record.json_payload,
+        )))
+    return rows
+
+
+def start_bigquery_sink(rows: list) -> list:
+    """Start the BigQuery writes for bigquery_rows() once Cloud SQL has committed. Returns (row_id, row, future) to finish."""
+    return [(row_id, row, write_row(row, row_id)) for row_id, row in rows]
+
+
+def finish_bigquery_sink(pending: list):
+    """
+    Route BigQuery failures to the outbox.
+
+    When the caller waits for BigQuery (BQ_BATCH_WAIT=flush, or batching off), this
+    blocks until every row has landed or been moved to the outbox. Otherwise rows
+    are checked when their batch completes, on the writer thread.
+    """
+    if BQ_BATCH_WAIT == "flush" or not BQ_BATCH_ENABLED:
+        wait([future for _, _, future in pending])
+        for row_id, row, future in pending:
+            _route_failure(row_id, row, future)
+        if pending:
+            logger.info("Saved to BigQuery")
+        return
+
+    for row_id, row, future in pending:
+        future.add_done_callback(lambda done, row_id=row_id, row=row: _route_failure(row_id, row, done))
+    if pending:
+        logger.info(f"Queued {len(pending)} row(s) for BigQuery")
+
+
+def _route_failure(row_id: str, row: dict, future):
+    error = future.exception()
+    if error is None:
+        return
+    logger.warning(f"BigQuery write failed, moving row {row_id} to the outbox: {error}")
+    try:
+        enqueue_outbox(row_id, row, error)
+    except Exception as e:
+        # Last resort: the spool's *.failed files (if BQ_SPOOL_DIR is set) still hold the row
+        logger.error(f"Could not write BigQuery row {row_id} to the outbox: {e}")
+
+
+# ============================================================
+# OUTBOX
+# ============================================================
+
+def enqueue_outbox(row_id: str, row: dict, error: Exception = None, table: str = None):
+    from shared.orm_models import BigQueryOutbox
+    with get_db() as db:
+        db.add(BigQueryOutbox(
+            table_name=table or table_id(),
+            row_id=row_id or f"outbox:{time.time_ns()}",
+            payload=json.dumps(row),
+            last_error=str(error)[:500] if error else None,
+        ))
+
+
+def relay_outbox_once(batch_size: int = BQ_OUTBOX_BATCH_SIZE) -> int:
+    """Retry due outbox rows. Returns how many landed in BigQuery."""
+    from shared.orm_models import BigQueryOutbox
+    now = datetime.utcnow()
+    with get_db() as db:
+        # SKIP LOCKED: several workers can relay at once without double-sending
+        entries = db.query(BigQueryOutbox).filter(
+            BigQueryOutbox.next_attempt_at <= now
+        ).order_by(BigQueryOutbox.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not entries:
+            return 0
+
+        by_table = {}
+        for entry in entries:
+            by_table.setdefault(entry.table_name, []).append(entry)
+
+        sent = 0
+        for table, group in by_table.items():
+            try:
+                insert_rows([json.loads(e.payload) for e in group], [e.row_id for e in group], table=table)
+            except Exception as e:
+                for entry in group:
+                    delay = min(OUTBOX_MAX_DELAY_SECONDS, 60 * 2 ** entry.attempts)
+                    db.execute(
+                        update(BigQueryOutbox)
+                        .where(BigQueryOutbox.id == entry.id)
+                        .values(
+                            attempts=BigQueryOutbox.attempts + 1,
+                            last_error=str(e)[:500],
+                            next_attempt_at=now + timedelta(seconds=delay),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                logger.warning(f"Outbox relay of {len(group)} row(s) to {table} failed: {e}")
+                continue
+            for entry in group:
+                db.delete(entry)
+            sent += len(group)
+    if sent:
+        logger.info(f"Outbox relay: {sent} row(s) delivered to BigQuery")
+    return sent
+
+
+def start_outbox_relay(interval: int = BQ_OUTBOX_INTERVAL):
+    """Background thread retrying outbox rows every `interval` seconds (0 disables)."""
+    if interval <= 0:
+        return
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                # Keep draining while full batches come back
+                while relay_outbox_once() >= BQ_OUTBOX_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"Outbox relay failed: {e}")
+
+    threading.Thread(target=run, name="bq-outbox", daemon=True).start()
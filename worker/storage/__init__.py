@@ -0,0 +1,80 @@
+"""Artifact storage - GCS or local filesystem, selected by STORAGE_BACKEND.
+
+Writes go to the configured backend. Reads dispatch on the URI scheme, so
+artifacts written under another backend (gs:// vs file://) stay readable.
+Backends are created on first use; importing this package opens no clients.
+"""
+import threading
+from typing import BinaryIO, Dict, Iterator, Tuple
+
+from shared.config import STORAGE_BACKEND, STORAGE_CHUNK_SIZE
+
+from .base import StorageBackend, content_hash, content_addressed_path
+
+BACKEND_SCHEMES = {"gcs": "gs", "local": "file"}
+
+_backends: Dict[str, StorageBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def _create_backend(scheme: str) -> StorageBackend:
+    # Imported lazily so the local backend never needs google-cloud-storage
+    if scheme == "gs":
+        from .gcs import GCSBackend
+        return GCSBackend()
+    if scheme == "file":
+        from .local import LocalBackend
+        return LocalBackend()
+    raise ValueError(f"Unknown storage scheme: {scheme}")
+
+
+def _backend(scheme: str) -> StorageBackend:
+    with _backends_lock:
+        if scheme not in _backends:
+            _backends[scheme] = _create_backend(scheme)
+        return _backends[scheme]
+
+
+def get_storage() -> StorageBackend:
+    """The backend new artifacts are written to."""
+    if STORAGE_BACKEND not in BACKEND_SCHEMES:
+        raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND} (expected one of {list(BACKEND_SCHEMES)})")
+    return _backend(BACKEND_SCHEMES[STORAGE_BACKEND])
+
+
+def backend_for(uri: str) -> StorageBackend:
+    """The backend that owns a URI; bare paths belong to the configured backend."""
+    scheme, sep, _ = uri.partition("://")
+    return _backend(scheme) if sep else get_storage()
+
+
+# --- convenience wrappers ---
+
+def upload(content: bytes, path: str, content_type: str = "text/plain") -> str:
+    return get_storage().upload(content, path, content_type)
+
+
+def upload_if_missing(content: bytes, path: str, content_type: str = "text/plain") -> Tuple[str, bool]:
+    return get_storage().upload_if_missing(content, path, content_type)
+
+
+def upload_stream(fileobj: BinaryIO, path: str, content_type: str = "text/plain") -> str:
+    return get_storage().upload_stream(fileobj, path, content_type)
+
+
+def download(uri: str) -> bytes:
+    return backend_for(uri).download(uri)
+
+
+def open_stream(uri: str):
+    return backend_for(uri).open_stream(uri)
+
+
+def iter_chunks(uri: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Iterator[bytes]:
+    return backend_for(uri).iter_chunks(uri, chunk_size)
+
+
+__all__ = [
+    "StorageBackend", "get_storage", "backend_for", "content_hash", "content_addressed_path",
+    "upload", "upload_if_missing", "upload_stream", "download", "open_stream", "iter_chunks",
+]
@@ -0,0 +1,68 @@
+"""Storage backend interface - artifacts are addressed by URI (gs://..., file://...)."""
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Tuple
+
+from shared.config import STORAGE_CHUNK_SIZE
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 hex digest used to address artifacts by content."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def content_addressed_path(digest: str, prefix: str = "raw/bills", extension: str = "txt") -> str:
+    return f"{prefix}/sha256/{digest}.{extension}"
+
+
+class StorageBackend(ABC):
+    """Base interface for artifact storage."""
+
+    # URI scheme this backend owns, e.g. "gs" or "file"
+    scheme: str = ""
+
+    @abstractmethod
+    def uri(self, path: str) -> str:
+        """Full URI for a backend-relative path."""
+        pass
+
+    @abstractmethod
+    def upload(self, content: bytes, path: str, content_type: str = "text/plain") -> str:
+        """Write content (overwriting) and return its URI."""
+        pass
+
+    @abstractmethod
+    def upload_if_missing(self, content: bytes, path: str, content_type: str = "text/plain") -> Tuple[str, bool]:
+        """
+        Write content unless the object already exists.
+
+        Returns:
+            Tuple of (uri, uploaded)
+        """
+        pass
+
+    @abstractmethod
+    def upload_stream(self, fileobj: BinaryIO, path: str, content_type: str = "text/plain") -> str:
+        """Write a file-like object in chunks and return its URI."""
+        pass
+
+    @abstractmethod
+    def download(self, uri: str) -> bytes:
+        """Read an object's full content."""
+        pass
+
+    @abstractmethod
+    @contextmanager
+    def open_stream(self, uri: str) -> Iterator[BinaryIO]:
+        """Readable file-like object over an object's content."""
+        pass
+
+    def iter_chunks(self, uri: str, chunk_size: int = STORAGE_CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield an object's content chunk by chunk."""
+        with self.open_stream(uri) as stream:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
@@ -0,0 +1,116 @@
+"""GCS storage backend.
+
+Small objects use single-request uploads/downloads. Objects at or above
+STORAGE_STREAM_THRESHOLD are streamed in STORAGE_CHUNK_SIZE chunks and, when
+STORAGE_COMPRESS is on, gzip-compressed with `Content-Encoding: gzip` recorded
+on the blob so every reader decompresses transparently.
+"""
+import io
+import gzip
+import shutil
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Tuple
+
+from google.api_core import exceptions as gcp_exceptions
+from google.cloud import storage
+from shared.config import (
+    GCP_PROJECT, GCS_BUCKET,
+    STORAGE_STREAM_THRESHOLD, STORAGE_CHUNK_SIZE, STORAGE_COMPRESS,
+)
+
+from .base import StorageBackend
+
+# Already-compressed formats gain nothing from gzip
+INCOMPRESSIBLE_CONTENT_TYPES = ("application/pdf", "application/zip", "application/gzip", "image/")
+
+
+def should_compress(content_type: str) -> bool:
+    return STORAGE_COMPRESS and not content_type.startswith(INCOMPRESSIBLE_CONTENT_TYPES)
+
+
+class GCSBackend(StorageBackend):
+    """Artifacts in a GCS bucket, addressed as gs://bucket/path."""
+
+    scheme = "gs"
+
+    def __init__(self, bucket_name: str = GCS_BUCKET, project: str = GCP_PROJECT):
+        self.bucket_name = bucket_name
+        self.client = storage.Client(project=project)
+        self.bucket = self.client.bucket(bucket_name)
+
+    def uri(self, path: str) -> str:
+        return f"gs://{self.bucket_name}/{path}"
+
+    def _relative_path(self, path: str) -> str:
+        if path.startswith("gs://"):
+            path = path.replace(f"gs://{self.bucket_name}/", "")
+        return path
+
+    # --- writes ---
+
+    def upload_stream(self, fileobj: BinaryIO, path: str, content_type: str = "text/plain",
+                      compress: bool = None, if_generation_match: int = None) -> str:
+        """Stream a file-like object to GCS in chunks (resumable upload), optionally gzipped."""
+        if compress is None:
+            compress = should_compress(content_type)
+
+        blob = self.bucket.blob(path)
+        if compress:
+            blob.content_encoding = "gzip"
+
+        upload_kwargs = {"content_type": content_type}
+        if if_generation_match is not None:
+            upload_kwargs["if_generation_match"] = if_generation_match
+
+        with blob.open("wb", chunk_size=STORAGE_CHUNK_SIZE, **upload_kwargs) as writer:
+            if compress:
+                with gzip.GzipFile(fileobj=writer, mode="wb") as gz:
+                    shutil.copyfileobj(fileobj, gz, STORAGE_CHUNK_SIZE)
+            else:
+                shutil.copyfileobj(fileobj, writer, STORAGE_CHUNK_SIZE)
+        return self.uri(path)
+
+    def upload_if_missing(self, content: bytes, path: str, content_type: str = "text/plain") -> Tuple[str, bool]:
+        blob = self.bucket.blob(path)
+        if blob.exists():
+            return self.uri(path), False
+        try:
+            # Generation precondition: a concurrent writer of the same bytes wins, we don't overwrite
+            if len(content) >= STORAGE_STREAM_THRESHOLD:
+                self.upload_stream(io.BytesIO(content), path, content_type, if_generation_match=0)
+            else:
+                blob.upload_from_string(content, content_type=content_type, if_generation_match=0)
+        except gcp_exceptions.PreconditionFailed:
+            return self.uri(path), False
+        return self.uri(path), True
+
+    def upload(self, content: bytes, path: str, content_type: str = "text/plain") -> str:
+        if len(content) >= STORAGE_STREAM_THRESHOLD:
+            return self.upload_stream(io.BytesIO(content), path, content_type)
+        blob = self.bucket.blob(path)
+        blob.upload_from_string(content, content_type=content_type)
+        return self.uri(path)
+
+    # --- reads ---
+
+    def download(self, uri: str) -> bytes:
+        """Download content (gzip-encoded objects come back decompressed)."""
+        blob = self.bucket.blob(self._relative_path(uri))
+        return blob.download_as_bytes()
+
+    @contextmanager
+    def open_stream(self, uri: str) -> Iterator[BinaryIO]:
+        """Chunked reader, decompressing gzip-encoded blobs on the fly."""
+        blob = self.bucket.get_blob(self._relative_path(uri))
+        if blob is None:
+            raise FileNotFoundError(uri)
+
+        # raw_download: ranged reads over the stored (compressed) bytes; we inflate locally
+        reader = blob.open("rb", chunk_size=STORAGE_CHUNK_SIZE, raw_download=True)
+        try:
+            if blob.content_encoding == "gzip":
+                yield gzip.GzipFile(fileobj=reader, mode="rb")
+            else:
+                yield reader
+        finally:
+            reader.close()
@@ -0,0 +1,98 @@
+"""Local filesystem storage backend.
+
+For co-located batch runs and benchmarks: reads are memory-mapped and writes
+go to a temp file in the target directory that is fsynced and renamed into
+place, so readers never see a partial artifact.
+"""
+import os
+import mmap
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Tuple
+
+from shared.config import STORAGE_LOCAL_ROOT, STORAGE_CHUNK_SIZE
+
+from .base import StorageBackend
+
+
+class LocalBackend(StorageBackend):
+    """Artifacts under a root directory, addressed as file:///abs/path."""
+
+    scheme = "file"
+
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def uri(self, path: str) -> str:
+        return f"file://{self._full_path(path)}"
+
+    def _full_path(self, path: str) -> str:
+        if path.startswith("file://"):
+            return path[len("file://"):]
+        full_path = os.path.abspath(os.path.join(self.root, path))
+        if os.path.commonpath([self.root, full_path]) != self.root:
+            raise ValueError(f"Path escapes storage root: {path}")
+        return full_path
+
+    # --- writes ---
+
+    def _write_temp(self, full_path: str, write) -> str:
+        """Write via `write(f)` into a durable temp file and return its path."""
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return temp_path
+
+    def upload(self, content: bytes, path: str, content_type: str = "text/plain") -> str:
+        full_path = self._full_path(path)
+        temp_path = self._write_temp(full_path, lambda f: f.write(content))
+        os.replace(temp_path, full_path)
+        return self.uri(path)
+
+    def upload_stream(self, fileobj: BinaryIO, path: str, content_type: str = "text/plain") -> str:
+        full_path = self._full_path(path)
+        temp_path = self._write_temp(full_path, lambda f: shutil.copyfileobj(fileobj, f, STORAGE_CHUNK_SIZE))
+        os.replace(temp_path, full_path)
+        return self.uri(path)
+
+    def upload_if_missing(self, content: bytes, path: str, content_type: str = "text/plain") -> Tuple[str, bool]:
+        full_path = self._full_path(path)
+        if os.path.exists(full_path):
+            return self.uri(path), False
+
+        temp_path = self._write_temp(full_path, lambda f: f.write(content))
+        try:
+            # link() fails if the target exists: a concurrent writer of the same bytes wins
+            os.link(temp_path, full_path)
+            return self.uri(path), True
+        except FileExistsError:
+            return self.uri(path), False
+        finally:
+            os.unlink(temp_path)
+
+    # --- reads ---
+
+    def download(self, uri: str) -> bytes:
+        with self.open_stream(uri) as stream:
+            return stream.read()
+
+    @contextmanager
+    def open_stream(self, uri: str) -> Iterator[BinaryIO]:
+        """Memory-mapped view of the file (mmap supports read/seek like a file)."""
+        with open(self._full_path(uri), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # mmap can't map empty files
+                yield f
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
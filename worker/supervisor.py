@@ -0,0 +1,113 @@
+"""Worker supervisor - runs one worker process per core on a shared subscription."""
+import signal
+import time
+import logging
+import multiprocessing
+
+from shared.config import WORKER_PROCESSES, WORKER_SHUTDOWN_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Restart backoff for children that crash right after starting
+MIN_UPTIME_SECONDS = 10
+MAX_RESTART_DELAY_SECONDS = 30
+
+# Spawn (not fork) so every child builds its own gRPC / DB connections
+mp = multiprocessing.get_context("spawn")
+
+
+def run_worker():
+    """Child process entry point."""
+    from worker.main import main
+    main()
+
+
+class WorkerSlot:
+    """One supervised worker process and its restart state."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.started_at = 0.0
+        self.restart_delay = 1
+        self.next_start_at = 0.0
+
+    def start(self):
+        self.process = mp.Process(target=run_worker, name=f"worker-{self.index}")
+        self.process.start()
+        self.started_at = time.monotonic()
+        logger.info(f"Started worker-{self.index} (pid {self.process.pid})")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def schedule_restart(self):
+        """Back off exponentially if the child keeps dying right after start."""
+        uptime = time.monotonic() - self.started_at
+        if uptime >= MIN_UPTIME_SECONDS:
+            self.restart_delay = 1
+        else:
+            self.restart_delay = min(self.restart_delay * 2, MAX_RESTART_DELAY_SECONDS)
+        self.next_start_at = time.monotonic() + self.restart_delay
+        logger.warning(
+            f"worker-{self.index} exited with code {self.process.exitcode}, "
+            f"restarting in {self.restart_delay}s"
+        )
+        self.process = None
+
+
+def shutdown_children(slots: list):
+    """Ask children to drain (SIGTERM), then kill whatever is left after the timeout."""
+    running = [s.process for s in slots if s.is_alive()]
+    for process in running:
+        process.terminate()
+    
+    deadline = time.monotonic() + WORKER_SHUTDOWN_TIMEOUT
+    for process in running:
+        process.join(timeout=max(0, deadline - time.monotonic()))
+    
+    for process in running:
+        if process.is_alive():
+            logger.warning(f"{process.name} did not drain in {WORKER_SHUTDOWN_TIMEOUT}s, killing")
+            process.kill()
+            process.join()
+
+
+def main(num_processes: int = WORKER_PROCESSES):
+    """Start N workers and keep them running until SIGTERM/SIGINT."""
+    # Configured here, not at import: spawned children re-import this module
+    # and must keep the worker's own log format.
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - [supervisor] %(message)s"
+    )
+    logger.info(f"Starting supervisor with {num_processes} worker processes")
+    
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    slots = [WorkerSlot(i) for i in range(num_processes)]
+    for slot in slots:
+        slot.start()
+    
+    while not stopping:
+        for slot in slots:
+            if slot.process is not None and not slot.is_alive():
+                slot.schedule_restart()
+            elif slot.process is None and time.monotonic() >= slot.next_start_at:
+                slot.start()
+        time.sleep(0.5)
+    
+    logger.info("Shutting down, draining workers...")
+    shutdown_children(slots)
+    logger.info("Supervisor stopped")
+
+
+if __name__ == "__main__":
+    main()